@@ -18,29 +18,153 @@
 # Date			: 2025/08/01
 # Description	: Read spice netlist into Python object (API only)
 # =====================================================================
-import os
+import os, io, time
+import concurrent.futures as cf
 import rdnl.func as func
+import rdnl.cache as cache
 import rdnl.vsnl as vsnl
 
 # ---------------------------------------------------------------------
 # read netlist
 # ---------------------------------------------------------------------
-def read_netlist(file_path, rowcmt = '*', inline = '$'):
+def read_netlist(file_path, rowcmt = '*', inline = '$', use_cache = True, lazy = False, workers = 1):
 	'''
 	Description:
 		Read Spice netlist
 	Args:
 		Netlist file path
+		Row comment character
+		Inline comment character
+		Use parsed netlist cache
+		Load subckt body only when first accessed
+		Number of parser processes
+		(gzip/bz2/xz/zstd netlist is streamed, lazy/workers ignored)
 	Return:
 		Netlist
 	'''
 	file_path = os.path.realpath(file_path)
-	tmp_file_path = '/tmp/' + os.path.basename(file_path) + '.tmp'
-	func.proc_netlist(file_path, tmp_file_path, rowcmt, inline)
-	os.system(f'sed -i \'1d\' {tmp_file_path}')
-	netlist = func.parse_netlist(tmp_file_path, file_path)
+	codec = func.get_codec(file_path)
+	if lazy and not codec:
+		with open(file_path, 'rb') as f:
+			return func.parse_lazy_netlist(f, file_path, rowcmt, inline)
+	opts = (rowcmt, inline)
+	if use_cache:
+		netlist = cache.load(file_path, *opts)
+		if netlist:
+			return netlist
+	if workers > 1 and not codec:
+		netlist = func.parse_parallel_netlist(file_path, workers, rowcmt, inline)
+	else:
+		with func.open_netlist(file_path) as f:
+			lines = func.rd_netlist_lines(f, rowcmt, inline)
+			netlist = func.parse_netlist(lines, file_path, None, rowcmt, inline)
+	if use_cache:
+		cache.store(netlist, file_path, *opts)
 	return netlist
 
+# ---------------------------------------------------------------------
+# read netlists
+# ---------------------------------------------------------------------
+def read_netlists(file_paths, workers = None, **kwargs):
+	'''
+	Description:
+		Read Spice netlists concurrently in process pool
+	Args:
+		Netlist file paths
+		Number of reader processes (default CPU count)
+		Keyword arguments of read_netlist
+	Return:
+		Netlists (None if failed) in input order
+		Report of (file path, run time, error) in input order
+	'''
+	workers = workers if workers else os.cpu_count()
+	netlists, report = [], []
+	if workers <= 1:
+		for file_path in file_paths:
+			time_start = time.time()
+			try:
+				netlists.append(read_netlist(file_path, **kwargs))
+				error = None
+			except Exception as e:
+				netlists.append(None)
+				error = f'{type(e).__name__}: {e}'
+			report.append((file_path, time.time() - time_start, error))
+		return netlists, report
+	with cf.ProcessPoolExecutor(max_workers = workers) as pool:
+		jobs = [pool.submit(_read_netlist_job, file_path, kwargs) for file_path in file_paths]
+		for file_path, job in zip(file_paths, jobs):
+			try:
+				data, time_run, error = job.result()
+			except Exception as e:
+				data, time_run, error = None, 0, f'{type(e).__name__}: {e}'
+			netlist = None
+			if data != None:
+				with func.no_gc():
+					netlist = cache.load_netlist(io.BytesIO(data))
+			netlists.append(netlist)
+			report.append((file_path, time_run, error))
+	return netlists, report
+
+def _read_netlist_job(file_path, kwargs):
+	time_start = time.time()
+	try:
+		netlist = read_netlist(file_path, **kwargs)
+		f = io.BytesIO()
+		cache.dump(netlist, f)
+		return f.getvalue(), time.time() - time_start, None
+	except Exception as e:
+		return None, time.time() - time_start, f'{type(e).__name__}: {e}'
+
+# ---------------------------------------------------------------------
+# iterate netlist
+# ---------------------------------------------------------------------
+def iter_netlist(file_path, rowcmt = '*', inline = '$'):
+	'''
+	Description:
+		Stream Spice netlist as events without building netlist
+	Args:
+		Netlist file path
+		Row comment character
+		Inline comment character
+	Return:
+		Generator of events
+			('subckt', name, ports, attr)
+			('inst', name, nets, master, attr)
+			('global', nets)
+			('ends', name)
+			('include', path, section) (.include/.lib call, section None for .include)
+			('lib', section) (start of .lib section)
+			('endl',) (end of .lib section)
+	'''
+	file_path = os.path.realpath(file_path)
+	with func.open_netlist(file_path) as f:
+		yield from func.iter_netlist_events(func.rd_netlist_lines(f, rowcmt, inline))
+
+# ---------------------------------------------------------------------
+# get cache statistics
+# ---------------------------------------------------------------------
+def get_cache_stats():
+	'''
+	Description:
+		Get parsed netlist cache hit/miss counters
+	Args:
+	Return:
+		Dictionary of hit and miss counts
+	'''
+	return dict(cache.stats)
+
+# ---------------------------------------------------------------------
+# clear cache
+# ---------------------------------------------------------------------
+def clear_cache():
+	'''
+	Description:
+		Remove all parsed netlist cache entries and reset counters
+	Args:
+	Return:
+	'''
+	cache.clear()
+
 # ---------------------------------------------------------------------
 # show netlist in GUI
 # ---------------------------------------------------------------------
@@ -0,0 +1,182 @@
+#!/usr/bin/python3
+
+# CONFIDENTIAL AND PROPRIETARY CODE
+# =====================================================================
+# Copyright (c) 2025 [Yuan Ming Yu]. All rights reserved.
+# This code is confidential and proprietary to [Yuan Ming Yu].
+#
+# Unauthorized copying, modification, distribution, or disclosure of this
+# code is strictly prohibited.
+#
+# This code is provided "as-is" without any warranty, express or implied.
+# Use at your own risk.
+#
+# For any inquiries regarding usage or licensing, please contact:
+# [Contact Information or Legal Team Email]
+# =====================================================================
+# Author		: Yuan Ming Yu
+# Date			: 2025/08/01
+# Description	: Read spice netlist into Python object (parsed netlist cache)
+# =====================================================================
+import os, pickle, hashlib, tempfile
+import rdnl.core as core
+import rdnl.func as func
+import rdnl.globalvar as gv
+
+version = 19
+stats = {'hit': 0, 'miss': 0}
+
+# ---------------------------------------------------------------------
+# get cache entry path
+# ---------------------------------------------------------------------
+def get_entry_path(file_path, *opts):
+	stat = os.stat(file_path)
+	key = [version, file_path, stat.st_size, stat.st_mtime_ns] + list(opts)
+	key = ':'.join([str(i) for i in key])
+	return os.path.join(gv.cache_dir, hashlib.sha1(key.encode()).hexdigest() + '.pkl')
+
+# ---------------------------------------------------------------------
+# Class: pickler
+# ---------------------------------------------------------------------
+class pickler(pickle.Pickler):
+	'''
+	Description:
+		Netlist pickler storing shared library subckts by reference
+	Props:
+		netlist		: Netlist to be pickled
+	'''
+
+	def __init__(self, f, netlist):
+		super().__init__(f, pickle.HIGHEST_PROTOCOL)
+		self.netlist = netlist
+
+	def persistent_id(self, obj):
+		if isinstance(obj, core.subckt) and obj.netlist != None and obj.netlist.lib:
+			if obj.netlist != self.netlist:
+				return obj.netlist.lib + (obj.name,)
+		return None
+
+# ---------------------------------------------------------------------
+# Class: unpickler
+# ---------------------------------------------------------------------
+class unpickler(pickle.Unpickler):
+	'''
+	Description:
+		Netlist unpickler resolving shared library subckts from library cache
+	Props:
+	'''
+
+	def persistent_load(self, pid):
+		lib_path, section, rowcmt, inline, name = pid
+		return func.read_lib(lib_path, section, rowcmt, inline).get_subckt(name)
+
+# ---------------------------------------------------------------------
+# dump netlist
+# ---------------------------------------------------------------------
+def dump(netlist, f):
+	lib_paths = func.get_lib_paths(netlist)
+	deps = []
+	for lib_path in lib_paths:
+		stat = os.stat(lib_path)
+		deps.append((lib_path, stat.st_size, stat.st_mtime_ns))
+	pickle.dump(deps, f, pickle.HIGHEST_PROTOCOL)
+	if lib_paths:
+		pickler(f, netlist).dump(netlist)
+	else:
+		pickle.dump(netlist, f, pickle.HIGHEST_PROTOCOL)
+
+# ---------------------------------------------------------------------
+# load netlist
+# ---------------------------------------------------------------------
+def load_netlist(f):
+	deps = pickle.load(f)
+	for lib_path, size, mtime in deps:
+		stat = os.stat(lib_path)
+		if (stat.st_size, stat.st_mtime_ns) != (size, mtime):
+			return None
+	if deps:
+		return unpickler(f).load()
+	else:
+		return pickle.load(f)
+
+# ---------------------------------------------------------------------
+# load netlist from cache
+# ---------------------------------------------------------------------
+def load(file_path, *opts):
+	entry_path = get_entry_path(file_path, *opts)
+	netlist = None
+	with func.no_gc():
+		try:
+			with open(entry_path, 'rb') as f:
+				netlist = load_netlist(f)
+		except FileNotFoundError:
+			pass
+		except Exception:
+			remove(entry_path)
+	if netlist == None:
+		stats['miss'] += 1
+		return None
+	try:
+		os.utime(entry_path)
+	except OSError:
+		pass
+	stats['hit'] += 1
+	return netlist
+
+# ---------------------------------------------------------------------
+# store netlist into cache
+# ---------------------------------------------------------------------
+def store(netlist, file_path, *opts):
+	if gv.cache_size <= 0:
+		return
+	entry_path = get_entry_path(file_path, *opts)
+	try:
+		os.makedirs(gv.cache_dir, exist_ok = True)
+		fd, tmp_path = tempfile.mkstemp(dir = gv.cache_dir, suffix = '.tmp')
+	except OSError:
+		return
+	try:
+		with os.fdopen(fd, 'wb') as f:
+			dump(netlist, f)
+		os.replace(tmp_path, entry_path)
+		evict(gv.cache_size)
+	except Exception:
+		remove(tmp_path)
+
+# ---------------------------------------------------------------------
+# evict least recently used cache entries
+# ---------------------------------------------------------------------
+def evict(cache_size):
+	entries = []
+	for name in os.listdir(gv.cache_dir):
+		if not name.endswith('.pkl'):
+			continue
+		entry_path = os.path.join(gv.cache_dir, name)
+		try:
+			stat = os.stat(entry_path)
+		except FileNotFoundError:
+			continue
+		entries.append((stat.st_mtime_ns, stat.st_size, entry_path))
+	total = sum([size for _, size, _ in entries])
+	for _, size, entry_path in sorted(entries):
+		if total <= cache_size:
+			break
+		remove(entry_path)
+		total -= size
+
+# ---------------------------------------------------------------------
+# clear cache
+# ---------------------------------------------------------------------
+def clear():
+	if os.path.isdir(gv.cache_dir):
+		evict(0)
+	stats['hit'] = stats['miss'] = 0
+
+# ---------------------------------------------------------------------
+# remove file
+# ---------------------------------------------------------------------
+def remove(file_path):
+	try:
+		os.remove(file_path)
+	except OSError:
+		pass
@@ -18,7 +18,7 @@
 # Date			: 2025/08/01
 # Description	: Read spice netlist into Python object (core class only)
 # =====================================================================
-import schemdraw
+import sys, array, weakref, schemdraw
 import schemdraw.elements as elm
 import rdnl.func as func
 import rdnl.globalvar as gv
@@ -34,16 +34,34 @@ class netlist():
 		path		: Netlist absolute file path
 		globals		: Global powers
 		top_subckt	: Top-level subckt
-		subckts		: All netlist subckts
+		subckts		: All netlist subckts (library subckts are shared and read-only, indexed by name)
 		deli		: Hierarchy delimiter
+		includes	: Included library paths and sections
+		libs		: Included library netlists (same order as includes, None if not read)
+		lib			: Library cache key if netlist is shared library
+		node_index	: Electrical node index (None until built)
+		_serial		: Edit serial of netlist subckts (derived caches are rebuilt when it changes)
+		_clones		: Clones sharing subckts owned by netlist (None until first clone)
 	'''
 
+	__slots__ = ('path', 'globals', 'top_subckt', 'deli', '_subckts', 'includes', 'libs', 'lib',
+				 'node_index', '_users', '_summaries', '_serial', '_clones', 'vcc', 'gnd', 'nmos', 'pmos', 'linear',
+				 '__weakref__')
+
 	def __init__(self, path, globals, top_subckt, subckts):
 		self.path = path
 		self.globals = globals
 		self.top_subckt = top_subckt
 		self.deli = '.'
 		self.subckts = sorted(subckts, key = lambda subckt:subckt.name)
+		self.includes = []
+		self.libs = []
+		self.lib = None
+		self.node_index = None
+		self._users = None
+		self._summaries = None
+		self._serial = 0
+		self._clones = None
 		self.vcc = ['vcc', 'vdd']
 		self.gnd = ['gnd', 'vss']
 		self.nmos = ['nmos']
@@ -53,6 +71,59 @@ class netlist():
 	def __repr__(self):
 		return self.path
 
+	def __getstate__(self):
+		state = {slot: getattr(self, slot) for slot in self.__slots__ if slot != '__weakref__'}
+		state['node_index'] = state['_users'] = state['_summaries'] = state['_clones'] = None
+		return None, state
+
+	@property
+	def subckts(self):
+		return self._subckts
+
+	@subckts.setter
+	def subckts(self, subckts):
+		self._subckts = name_list(subckts)
+
+	def clone(self):
+		'''
+		Description:
+			Clone netlist sharing subckts with this netlist until edited
+			(clone copies shared subckt on write through short_by_term, edit
+			sessions and own_subckt, subckt edited through its own netlist
+			is first copied into clones still sharing it)
+		Args:
+		Return:
+			Netlist
+		'''
+		self._adopt_subckts()
+		clone = netlist.__new__(netlist)
+		for slot in self.__slots__:
+			if slot != '__weakref__':
+				setattr(clone, slot, getattr(self, slot))
+		for slot in ['globals', 'includes', 'libs', 'vcc', 'gnd', 'nmos', 'pmos', 'linear']:
+			setattr(clone, slot, list(getattr(self, slot)))
+		clone.subckts = list(self.subckts)
+		clone.node_index = clone._users = clone._summaries = clone._clones = None
+		for owner in dict.fromkeys([subckt.netlist for subckt in self.subckts]):
+			if not owner.lib:
+				if owner._clones == None:
+					owner._clones = weakref.WeakSet()
+				owner._clones.add(clone)
+		return clone
+
+	def own_subckt(self, subckt):
+		'''
+		Description:
+			Get subckt owned by netlist for editing (shared library/clone
+			subckt is copied together with all upper subckts instantiating it)
+		Args:
+			Subckt or subckt name
+		Return:
+			Subckt (None if not found)
+		'''
+		name = subckt if isinstance(subckt, str) else subckt.name
+		return self._own_subckts([name])[0]
+
 	def get_str_path(self, path):
 		'''
 		Description:
@@ -73,17 +144,7 @@ class netlist():
 		Return:
 			Subckt
 		'''
-		l = 0
-		r = len(self.subckts) - 1
-		while l <= r:
-			m = round((r - l) / 2) + l
-			if self.subckts[m].name == name:
-				return self.subckts[m]
-			elif self.subckts[m].name >= name:
-				r = m - 1
-			else:
-				l = m + 1
-		return None
+		return self.subckts.get(name)
 
 	def get_path_from_str(self, path):
 		'''
@@ -99,18 +160,99 @@ class netlist():
 	def write(self, f, max_len = 80):
 		'''
 		Description:
-			Write netlist into output file
+			Write netlist into output file (edited copies of library
+			subckts are written under new names, library keeps its names)
 		Args:
 			File handler
 		Return:
 		'''
-		if self.globals:
-			f.write('.global ' + ' '.join(self.globals) + '\n\n')
+		self._write_header(f)
+		renames = self._get_lib_renames()
 		for subckt in self.subckts[1:]:
-			subckt.write(f)
+			if subckt.netlist != self and subckt.netlist != None and subckt.netlist.lib:
+				continue
+			subckt.write(f, renames)
 			f.write('\n')
 		for inst in self.top_subckt.insts:
-			inst.write(f)
+			inst.write(f, renames)
+
+	def write_flat(self, f):
+		'''
+		Description:
+			Write flattened netlist into output file (primitives are
+			streamed one by one without building flat netlist)
+		Args:
+			File handler
+		Return:
+			Number of primitives
+		'''
+		self._write_header(f)
+		pri_num = 0
+		for name, nets, master, attr in self.iter_flat():
+			f.write(func.get_inst_line(name, nets, master, attr))
+			pri_num += 1
+		return pri_num
+
+	def flatten(self):
+		'''
+		Description:
+			Flatten netlist into top-level primitives with hierarchical
+			names and canonical node names
+		Args:
+		Return:
+			Netlist (flat)
+		'''
+		top_subckt = subckt('', [], [], {})
+		flat = netlist(self.path, list(self.globals), top_subckt, [top_subckt])
+		flat.deli = self.deli
+		flat.includes = list(self.includes)
+		flat.libs = list(self.libs)
+		insts = []
+		with func.no_gc():
+			for name, nets, master, attr in self.iter_flat():
+				pri = inst(name, nets, top_subckt, master, attr)
+				pri._is_pri = True
+				insts.append(pri)
+			top_subckt.insts = insts
+		top_subckt.netlist = flat
+		return flat
+
+	def get_pri_table(self):
+		'''
+		Description:
+			Export flattened primitives into NumPy arrays (requires numpy)
+		Args:
+		Return:
+			Primitive table
+		'''
+		return pri_table(self)
+
+	def iter_flat(self):
+		'''
+		Description:
+			Walk all primitives top-down in one pass (memory only grows with
+			hierarchy depth), nets are named by top-most net on same node
+			and global nets keep their names
+		Args:
+		Return:
+			Generator of primitive names, net names, masters and attributes
+		'''
+		deli, globals = self.deli, set(self.globals)
+		def expand(state):
+			subckt, prefix, names = state
+			for inst in subckt.insts:
+				nets = [names[net_id] for net_id in inst.net_ids]
+				if inst.is_pri:
+					yield True, (prefix + inst.name, nets, inst.master, inst.attr)
+					continue
+				master = inst.master
+				port_ids = master.port_ids
+				inst_prefix = prefix + inst.name + deli
+				lower_names = [net if net in globals else inst_prefix + net for net in master.get_net_names()]
+				for port_id, net in zip(port_ids, nets):
+					lower_names[port_id] = net
+				yield False, (master, inst_prefix, lower_names)
+		return func.walk((self.top_subckt, '', self.top_subckt.get_net_names()), expand)
 
 	def get_top_path(self, net_path):
 		'''
@@ -121,13 +263,17 @@ class netlist():
 		Return:
 			Net path
 		'''
-		up_net_path = self.get_up_path(net_path)
 		if not net_path or not isinstance(net_path[-1], str):
 			return []
-		elif not up_net_path:
-			return net_path
-		else:
-			return self.get_top_path(up_net_path)
+		net, l = net_path[-1], len(net_path) - 1
+		while l > 0:
+			inst = net_path[l - 1]
+			i = inst.master.get_port_index(net)
+			if i == None:
+				break
+			net = inst._subckt.get_net_name(inst.net_ids[i])
+			l -= 1
+		return list(net_path[:l]) + [net]
 
 	def get_up_path(self, net_path):
 		'''
@@ -142,31 +288,22 @@ class netlist():
 			return []
 		net = net_path[-1]
 		inst = net_path[-2]
-		subckt = inst.master
-		for i in range(len(subckt.ports)):
-			if net == subckt.ports[i]:
-				return net_path[:-2] + [inst.nets[i]]
+		i = inst.master.get_port_index(net)
+		if i != None:
+			return list(net_path[:-2]) + [inst.nets[i]]
 		return []
 
 	def get_net_to_pri_paths(self, net_path):
 		'''
 		Description:
 			Get all primitive paths and terminals connected to net path
+			(primitives below instance ports come from memoized port summaries)
 		Args:
 			Net path
 		Return:
-			Generator of primitive paths and terminals
+			Generator of primitive paths (tuples) and terminals
 		'''
-		top_net_path = self.get_top_path(net_path)
-		if not top_net_path:
-			return
-			yield
-		else:
-			l = len(top_net_path)
-			subckt = self.top_subckt if l == 1 else top_net_path[-2].master
-			net = top_net_path[-1]
-			path = top_net_path[:-1]
-		yield from self._get_net_to_pri_paths_rcs(subckt, net, path)
+		return self._get_node_summary(self.get_top_path(net_path))
 
 	def get_subckt_inst_paths(self, subckt_name):
 		'''
@@ -175,10 +312,55 @@ class netlist():
 		Args:
 			Subckt name
 		Return:
-			Generator of instance paths
+			Generator of instance paths (tuples)
+		'''
+		users = self._get_users()
+		def expand(state):
+			name, lower = state
+			if name == '':
+				yield True, func.get_chain_path(lower)
+			for inst in users.get(name, ()):
+				yield False, (inst.subckt, (inst, lower))
+		return func.walk((subckt_name, None), expand)
+
+	def get_users(self, subckt_name):
+		'''
+		Description:
+			Get all instances of subckt/primitive (where-used)
+		Args:
+			Subckt name
+		Return:
+			Instances
+		'''
+		return list(self._get_users().get(subckt_name, []))
+
+	def get_subckt_inst_count(self, subckt_name):
+		'''
+		Description:
+			Get number of instance paths from subckt name without enumeration
+		Args:
+			Subckt name
+		Return:
+			Number of instance paths
 		'''
-		subckt_dict = func.get_subckt_dict(self)
-		yield from self._get_subckt_inst_paths_rcs(subckt_name, subckt_dict)
+		users = self._get_users()
+		counts, pending = {'': 1}, set()
+		stack = [subckt_name]
+		while stack:
+			name = stack[-1]
+			if name in counts:
+				stack.pop()
+				continue
+			uppers = [inst.subckt for inst in users.get(name, [])]
+			uppers = [upper for upper in dict.fromkeys(uppers) if upper not in counts and upper not in pending]
+			if name not in pending and uppers:
+				pending.add(name)
+				stack += uppers
+				continue
+			stack.pop()
+			pending.discard(name)
+			counts[name] = sum([counts.get(inst.subckt, 0) for inst in users.get(name, [])])
+		return counts[subckt_name]
 
 	def is_same_net(self, net_path_1, net_path_2):
 		'''
@@ -190,10 +372,69 @@ class netlist():
 		Return:
 			Boolean
 		'''
+		if self.node_index != None:
+			node_1 = self.get_node(net_path_1)
+			return node_1 != None and node_1 == self.get_node(net_path_2)
 		top_net_path_1 = self.get_top_path(net_path_1)
 		top_net_path_2 = self.get_top_path(net_path_2)
 		return top_net_path_1 == top_net_path_2
 
+	def build_node_index(self):
+		'''
+		Description:
+			Build electrical node index (is_same_net then also
+			matches nets joined by global nets or inner port shorts,
+			node ids of previous index are not reused)
+		Args:
+		Return:
+			Node index
+		'''
+		base = 0 if self.node_index == None else self.node_index.base + len(self.node_index.nodes)
+		self.node_index = node_index(self, base)
+		return self.node_index
+
+	def get_node(self, net_path):
+		'''
+		Description:
+			Get electrical node id of net path (node index is built if needed,
+			ids from before netlist edits never match ids after them)
+		Args:
+			Net path
+		Return:
+			Node id (None if net path is invalid)
+		'''
+		if self.node_index == None or not self.node_index.is_valid():
+			self.build_node_index()
+		return self.node_index.get_node(net_path)
+
+	def group_by_node(self, net_paths):
+		'''
+		Description:
+			Group net paths by electrical node
+		Args:
+			Net paths
+		Return:
+			Node id to net paths
+		'''
+		groups = {}
+		for net_path in net_paths:
+			node = self.get_node(net_path)
+			if node != None:
+				groups.setdefault(node, []).append(net_path)
+		return groups
+
+	def get_node_paths(self, net_path):
+		'''
+		Description:
+			Get all net paths on same electrical node
+		Args:
+			Net path
+		Return:
+			Generator of net paths
+		'''
+		if self.get_node(net_path) != None:
+			yield from self.node_index.get_node_paths(net_path)
+
 	def get_net_path_at_term(self, inst_path, term):
 		'''
 		Description:
@@ -207,7 +448,7 @@ class netlist():
 		if not inst_path:
 			return []
 		else:
-			return inst_path[:-1] + [inst_path[-1].nets[term]]
+			return list(inst_path[:-1]) + [inst_path[-1].nets[term]]
 
 	def get_hier_net_paths(self, net_path):
 		'''
@@ -216,40 +457,72 @@ class netlist():
 		Args:
 			Net path
 		Return:
-			Generator of net paths
+			Generator of net paths (tuples)
 		'''
 		top_net_path = self.get_top_path(net_path)
-		if not top_net_path:
+		subckt = top_net_path[-2].master if len(top_net_path) > 1 else self.top_subckt
+		if top_net_path and subckt.get_net_id(top_net_path[-1]) == None:
+			yield tuple(top_net_path)
 			return
-			yield
-		else:
-			l = len(top_net_path)
-			subckt = self.top_subckt if l == 1 else top_net_path[-2].master
-			net = top_net_path[-1]
-			path = top_net_path[:-1]
-		yield from self._get_net_paths_rcs(subckt, net, path)
+		def visit_net(path, subckt, net_id):
+			return path + (subckt.get_net_name(net_id),)
+		def visit_inst(path, inst, terms):
+			return None, not inst.is_pri
+		yield from self.walk_net(net_path, visit_inst, visit_net)
 
 	def short_by_term(self, master, terms):
 		'''
 		Description:
 			Short instance master on all specified terminals
+			(disjoint shorts in same subckt keep separate winner nets)
 		Args:
 			Master name
 			Terminals
 		Return:
+			Subckt name to old to new net names
 		'''
-		for subckt in self.subckts:
-			nets = []
-			for inst in list(subckt.insts):
-				if str(inst.master) == master:
-					nets += [inst.nets[t] for t in terms]
-					subckt.insts.remove(inst)
-			if nets:
-				win_net = self._get_win_net(nets)
-				for inst in subckt.insts:
-					for i in range(len(inst.nets)):
-						if inst.nets[i] in nets:
-							inst.nets[i] = win_net
+		merges = {}
+		with func.no_gc():
+			matches = {}
+			for subckt in self.subckts:
+				match = [str(inst.master) == master for inst in subckt.insts]
+				if any(match):
+					matches[subckt.name] = match
+			for subckt in self._own_subckts(list(matches)):
+				groups, insts = [], []
+				for inst, match in zip(subckt.insts, matches[subckt.name]):
+					if match:
+						net_ids = inst.net_ids
+						groups.append([net_ids[t] for t in terms])
+					else:
+						insts.append(inst)
+				subckt.insts = insts
+				merges[subckt.name] = subckt._merge_net_ids(groups)
+		return merges
+
+	def edit(self):
+		'''
+		Description:
+			Start edit session (edits are applied in bulk when session
+			exits and dropped if session exits with exception)
+		Args:
+		Return:
+			Edit session
+		'''
+		return edit_session(self)
+
+	def get_nets_to_pri_paths(self, net_paths):
+		'''
+		Description:
+			Get all primitive paths and terminals connected to each of net paths
+			(net paths on same top-level node are answered once, each input
+			gets its own result list)
+		Args:
+			Net paths or string paths
+		Return:
+			Input (string path or net path tuple) to list of primitive paths (tuples) and terminals
+		'''
+		return self._get_batch(net_paths)
 
 	def get_net_to_inst_paths(self, net_path, masters):
 		'''
@@ -260,35 +533,83 @@ class netlist():
 			Net path
 			Master names
 		Return:
-			Generator of instance/primitive paths and terminals
+			Generator of instance/primitive paths (tuples) and terminals
 		'''
-		top_net_path = self.get_top_path(net_path)
-		if not top_net_path:
-			return
-			yield
-		else:
-			l = len(top_net_path)
-			subckt = self.top_subckt if l == 1 else top_net_path[-2].master
-			net = top_net_path[-1]
-			path = top_net_path[:-1]
-		yield from self._get_net_to_inst_paths_rcs(subckt, net, path, masters)
-
-	def _get_net_to_inst_paths_rcs(self, subckt, port, path, masters):
-		for inst in subckt.insts:
-			l = len(inst.nets)
+		def visit_inst(path, inst, terms):
 			if str(inst.master) in masters:
-				terms = []
-				for i in range(l):
-					if inst.nets[i] == port:
-						terms.append(i)
-				if terms:
-					yield path + [inst], terms
-			elif not inst.is_pri:
-				for i in range(l):
-					if inst.nets[i] == port:
-						path.append(inst)
-						yield from self._get_net_to_inst_paths_rcs(inst.master, inst.master.ports[i], path, masters)
-						path.pop()
+				return (path + (inst,), list(terms)), False
+			return None, not inst.is_pri
+		return self.walk_net(net_path, visit_inst)
+
+	def get_nets_to_inst_paths(self, net_paths, masters):
+		'''
+		Description:
+			Get all instance/primitive paths and terminals with specified masters
+			connected to each of net paths (net paths on same top-level node
+			are answered once, port summaries are shared across inputs and
+			each input gets its own result list)
+		Args:
+			Net paths or string paths
+			Master names
+		Return:
+			Input (string path or net path tuple) to list of instance/primitive paths (tuples) and terminals
+		'''
+		return self._get_batch(net_paths, lambda inst: str(inst.master) in masters, {})
+
+	def walk_net(self, net_path, visit_inst, visit_net = None):
+		'''
+		Description:
+			Walk down hierarchy from top-level node of net path
+			with explicit stack and visitors (paths are tuples)
+		Args:
+			Net path
+			Instance visitor (path, instance, terminals) -> (result or None, descend)
+			Net visitor (path, subckt, net id) -> result or None
+		Return:
+			Generator of visitor results
+		'''
+		top_net_path = self.get_top_path(net_path)
+		subckt = top_net_path[-2].master if len(top_net_path) > 1 else self.top_subckt
+		net_id = subckt.get_net_id(top_net_path[-1]) if top_net_path else None
+		if net_id == None:
+			return iter(())
+		def expand(state):
+			subckt, net_id, path = state
+			if visit_net != None:
+				result = visit_net(path, subckt, net_id)
+				if result != None:
+					yield True, result
+			for inst, terms in subckt._get_inst_terms(net_id):
+				result, descend = visit_inst(path, inst, terms)
+				if result != None:
+					yield True, result
+				if descend:
+					inst_path = path + (inst,)
+					port_ids = inst.master.port_ids
+					for i in terms:
+						yield False, (inst.master, port_ids[i], inst_path)
+		return func.walk((subckt, net_id, tuple(top_net_path[:-1])), expand)
+
+	def _write_header(self, f):
+		if self.globals:
+			f.write('.global ' + ' '.join(self.globals) + '\n\n')
+		for path, section in self.includes:
+			f.write(f'.lib \'{path}\' {section}\n' if section else f'.include \'{path}\'\n')
+		if self.includes:
+			f.write('\n')
+
+	def _get_lib_renames(self):
+		lib_names = {subckt.name.lower() for lib in self.libs if lib != None for subckt in lib.subckts if subckt.name}
+		names = lib_names | {subckt.name.lower() for subckt in self.subckts}
+		renames = {}
+		for subckt in self.subckts[1:]:
+			if subckt.name.lower() in lib_names and (subckt.netlist == None or not subckt.netlist.lib):
+				i = 1
+				while f'{subckt.name}_{i}'.lower() in names:
+					i += 1
+				renames[subckt.name] = f'{subckt.name}_{i}'
+				names.add(renames[subckt.name].lower())
+		return renames
 
 	def _get_win_net(self, nets):
 		globals = [net for net in nets if net in self.globals]
@@ -297,63 +618,323 @@ class netlist():
 		else:
 			return max(nets)
 
-	def _get_net_paths_rcs(self, subckt, port, path):
-		yield path + [port]
-		for inst in subckt.insts:
-			if not inst.is_pri:
-				l = len(inst.nets)
-				for i in range(l):
-					if inst.nets[i] == port:
-						path.append(inst)
-						yield from self._get_net_paths_rcs(inst.master, inst.master.ports[i], path)
-						path.pop()
-
-	def _get_net_to_pri_paths_rcs(self, subckt, port, path):
-		for inst in subckt.insts:
-			l = len(inst.nets)
+	def _get_node_summary(self, top_net_path, match = None, summaries = None):
+		subckt = top_net_path[-2].master if len(top_net_path) > 1 else self.top_subckt
+		net_id = subckt.get_net_id(top_net_path[-1]) if top_net_path else None
+		if net_id == None:
+			return
+		match = match or (lambda inst: inst.is_pri)
+		path = tuple(top_net_path[:-1])
+		for inst, terms in subckt._get_inst_terms(net_id):
+			inst_path = path + (inst,)
+			if match(inst):
+				yield inst_path, list(terms)
+				continue
 			if inst.is_pri:
-				terms = []
-				for i in range(l):
-					if inst.nets[i] == port:
-						terms.append(i)
-				if terms:
-					yield path + [inst], terms
+				continue
+			port_ids = inst.master.port_ids
+			for i in terms:
+				for lower_path, lower_terms in self._get_summary(inst.master, port_ids[i], match, summaries):
+					yield inst_path + lower_path, list(lower_terms)
+
+	def _get_summary(self, subckt, net_id, match = None, summaries = None):
+		if summaries == None:
+			if self._summaries == None or self._summaries[0] != self._serial:
+				self._adopt_subckts()
+				self._summaries = (self._serial, {})
+			summaries = self._summaries[1]
+		match = match or (lambda inst: inst.is_pri)
+		key = (subckt, net_id)
+		if key in summaries:
+			return summaries[key]
+		stack, pending = [key], set()
+		while stack:
+			key = stack[-1]
+			if key in summaries:
+				stack.pop()
+				continue
+			subckt, net_id = key
+			lowers = []
+			for inst, terms in subckt._get_inst_terms(net_id):
+				if not inst.is_pri and not match(inst):
+					port_ids = inst.master.port_ids
+					lowers += [(inst.master, port_ids[i]) for i in terms]
+			lowers = [lower for lower in dict.fromkeys(lowers) if lower not in summaries and lower not in pending]
+			if key not in pending and lowers:
+				pending.add(key)
+				stack += lowers
+				continue
+			stack.pop()
+			pending.discard(key)
+			summary = []
+			for inst, terms in subckt._get_inst_terms(net_id):
+				if match(inst):
+					summary.append(((inst,), terms))
+					continue
+				if inst.is_pri:
+					continue
+				port_ids = inst.master.port_ids
+				for i in terms:
+					lower = summaries.get((inst.master, port_ids[i]), [])
+					summary += [((inst,) + lower_path, lower_terms) for lower_path, lower_terms in lower]
+			summaries[key] = summary
+		return summaries[(subckt, net_id)]
+
+	def _get_batch(self, net_paths, match = None, summaries = None):
+		results, nodes, prefixes = {}, {}, {}
+		with func.no_gc():
+			for net_path in net_paths:
+				key = net_path if isinstance(net_path, str) else tuple(net_path)
+				if key in results:
+					continue
+				if isinstance(net_path, str):
+					net_path = self._get_batch_path(net_path, prefixes)
+				top_net_path = tuple(self.get_top_path(net_path))
+				if top_net_path not in nodes:
+					nodes[top_net_path] = list(self._get_node_summary(top_net_path, match, summaries))
+					results[key] = nodes[top_net_path]
+				else:
+					results[key] = [(path, list(terms)) for path, terms in nodes[top_net_path]]
+		return results
+
+	def _get_batch_path(self, str_path, prefixes):
+		head, _, net = str_path.rpartition(self.deli)
+		if head not in prefixes:
+			prefix = self.get_path_from_str(head) if head else []
+			prefixes[head] = prefix if prefix and not isinstance(prefix[-1], str) else None
+		prefix = [] if not head else prefixes[head]
+		if prefix == None:
+			return []
+		subckt = prefix[-1].master if prefix else self.top_subckt
+		if subckt.get_inst(net) or not subckt.has_net(net):
+			return []
+		return prefix + [net]
+
+	def _own_subckts(self, names):
+		subckts = [self.subckts.get(name) for name in names]
+		shared = [subckt for subckt in subckts if subckt != None and not self._is_owned(subckt)]
+		if not shared:
+			return subckts
+		users = self._get_users()
+		copies, stack = {}, shared
+		while stack:
+			upper = stack.pop()
+			if upper.name in copies:
+				continue
+			if self._is_owned(upper):
+				copies[upper.name] = upper
+				continue
+			copies[upper.name] = upper._copy(self)
+			stack += dict.fromkeys([inst._subckt for inst in users.get(upper.name, [])])
+		for upper in copies.values():
+			for inst in upper.insts:
+				if not inst.is_pri and str(inst.master) in copies:
+					inst.master = copies[str(inst.master)]
+		self.subckts = [copies.get(subckt.name, subckt) for subckt in self.subckts]
+		self.top_subckt = copies.get(self.top_subckt.name, self.top_subckt)
+		self._serial += 1
+		return [subckt if subckt == None else copies.get(subckt.name, subckt) for subckt in subckts]
+
+	def _is_owned(self, subckt):
+		return (subckt.netlist is self or subckt.netlist == None) and not subckt._shared
+
+	def _get_inst_counts(self):
+		order, seen = [], {self.top_subckt}
+		stack = [(self.top_subckt, iter(self.top_subckt.insts))]
+		while stack:
+			upper, insts = stack[-1]
+			for inst in insts:
+				if not inst.is_pri and inst.master not in seen:
+					seen.add(inst.master)
+					stack.append((inst.master, iter(inst.master.insts)))
+					break
 			else:
-				for i in range(l):
-					if inst.nets[i] == port:
-						path.append(inst)
-						yield from self._get_net_to_pri_paths_rcs(inst.master, inst.master.ports[i], path)
-						path.pop()
-
-	def _get_subckt_inst_paths_rcs(self, subckt_name, dict, path = []):
-		if subckt_name == '':
-			yield path
-		for upper in dict:
-			if subckt_name in dict[upper]:
-				for inst in upper.insts:
-					master = inst.master if inst.is_pri else inst.master.name
-					if master == subckt_name:
-						yield from self._get_subckt_inst_paths_rcs(upper.name, dict, [inst] + path)
+				stack.pop()
+				order.append(upper)
+		counts = {self.top_subckt.name: 1}
+		for upper in reversed(order):
+			count = counts[upper.name]
+			for inst in upper.insts:
+				master = str(inst.master)
+				counts[master] = counts.get(master, 0) + count
+		return counts
+
+	def _unshare(self, subckt):
+		for clone in list(self._clones):
+			if clone.subckts.get(subckt.name) is subckt:
+				clone._own_subckts([subckt.name])
+
+	def _get_users(self):
+		if self._users == None or self._users[0] != self._serial:
+			self._adopt_subckts()
+			users = {}
+			for subckt in self.subckts:
+				for inst in subckt.insts:
+					users.setdefault(str(inst.master), []).append(inst)
+			self._users = (self._serial, users)
+		return self._users[1]
+
+	def _adopt_subckts(self):
+		for subckt in self.subckts:
+			if subckt.netlist == None:
+				subckt.netlist = self
 
 	def _sort_subckt(self):
 		self.subckts = sorted(self.subckts, key = lambda subckt:subckt.name)
 
-	def _get_net_to_pri_paths_rcs(self, subckt, port, path):
-		for inst in subckt.insts:
-			l = len(inst.nets)
-			if inst.is_pri:
-				terms = []
-				for i in range(l):
-					if inst.nets[i] == port:
-						terms.append(i)
-				if terms:
-					yield path + [inst], terms
-			else:
-				for i in range(l):
-					if inst.nets[i] == port:
-						path.append(inst)
-						yield from self._get_net_to_pri_paths_rcs(inst.master, inst.master.ports[i], path)
-						path.pop()
+# ---------------------------------------------------------------------
+# Class: edit_session
+# ---------------------------------------------------------------------
+class edit_session():
+	'''
+	Description:
+		Netlist edit session recording edits and applying them in bulk on commit
+		(lookups inside session see netlist before edits)
+	Props:
+		netlist		: Netlist under edit
+		edits		: Subckt to recorded edits (removed instances, added instances, net edits in order)
+	'''
+
+	def __init__(self, netlist):
+		self.netlist = netlist
+		self.edits = {}
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc, tb):
+		if exc_type == None:
+			self.commit()
+		else:
+			self.rollback()
+		return False
+
+	def remove_inst(self, inst):
+		'''
+		Description:
+			Record instance removal
+		Args:
+			Instance
+		Return:
+		'''
+		self._get_edit(inst._subckt)[0].add(inst)
+
+	def add_inst(self, inst):
+		'''
+		Description:
+			Record instance insertion (into netlist subckt named by instance subckt)
+		Args:
+			Instance
+		Return:
+		'''
+		self._get_edit(self.netlist.subckts.get(inst.subckt) or inst._subckt)[1].append(inst)
+
+	def replace_net(self, subckt, master_net, slave_net):
+		'''
+		Description:
+			Record replacement of subckt slave net by master net
+			(slave net may come from instance added in session)
+		Args:
+			Subckt
+			Net name (master)
+			Net name (slave)
+		Return:
+		'''
+		self._get_edit(subckt)[2].append(([master_net, slave_net], master_net))
+
+	def short_nets(self, subckt, nets):
+		'''
+		Description:
+			Record short of subckt nets (winner by global nets first, then max name)
+		Args:
+			Subckt
+			Net names
+		Return:
+		'''
+		self._get_edit(subckt)[2].append((list(nets), None))
+
+	def short_by_term(self, master, terms):
+		'''
+		Description:
+			Record short of instance master on all specified terminals
+		Args:
+			Master name
+			Terminals
+		Return:
+		'''
+		for subckt in self.netlist.subckts:
+			for inst in subckt.insts:
+				if str(inst.master) == master:
+					self.remove_inst(inst)
+					self.short_nets(subckt, [inst.nets[t] for t in terms])
+
+	def commit(self):
+		'''
+		Description:
+			Apply recorded edits (one instance list rebuild and one net move
+			per edited subckt, net edits resolve as if applied one by one,
+			all edits are undone if any subckt fails)
+		Args:
+		Return:
+			Subckt name to old to new net names
+		'''
+		edits, self.edits = self.edits, {}
+		saved, merges = [], {}
+		try:
+			with func.no_gc():
+				owneds = self.netlist._own_subckts([subckt.name for subckt in edits])
+				for owned, (subckt, (removes, adds, net_edits)) in zip(owneds, edits.items()):
+					if owned != None and owned is not subckt:
+						removes = {copy for copy, old in zip(owned.insts, subckt.insts) if old in removes}
+						adds = [self._copy_inst(add, owned) for add in adds]
+						subckt = owned
+					insts = list(subckt.insts)
+					saved.append((subckt, insts, [(inst, inst.net_ids[:]) for inst in insts + adds]))
+					if removes or adds:
+						subckt.insts = [inst for inst in insts if inst not in removes] + adds
+					if net_edits:
+						merges[subckt.name] = subckt._rename_nets(self._get_renames(net_edits))
+		except BaseException:
+			for subckt, insts, net_ids in saved:
+				for inst, inst_net_ids in net_ids:
+					inst.net_ids = inst_net_ids
+				subckt.insts = insts
+			raise
+		return merges
+
+	def rollback(self):
+		'''
+		Description:
+			Drop recorded edits
+		Args:
+		Return:
+		'''
+		self.edits = {}
+
+	def _copy_inst(self, add, subckt):
+		master = self.netlist.subckts.get(str(add.master)) or add.master
+		copy = inst(add.name, list(add.nets), subckt, master, add.attr)
+		copy.is_pri = add.is_pri
+		return copy
+
+	def _get_edit(self, subckt):
+		if subckt not in self.edits:
+			self.edits[subckt] = (set(), [], [])
+		return self.edits[subckt]
+
+	def _get_renames(self, net_edits):
+		holders = {}
+		for nets, win_net in net_edits:
+			win_net = self.netlist._get_win_net(nets) if win_net == None else win_net
+			members = []
+			for net in dict.fromkeys(nets):
+				held = holders.get(net, [net])
+				if len(held) > len(members):
+					held, members = members, held
+				members += held
+				holders[net] = []
+			holders[win_net] = members
+		return {net: win_net for win_net, members in holders.items() for net in members if net != win_net}
 
 # ---------------------------------------------------------------------
 # Class: subckt
@@ -366,20 +947,86 @@ class subckt():
 		name		: Subckt name
 		ports		: Subckt ports
 		insts		: All instances under subckt
+		port_ids	: Subckt port net ids
+		port_index	: Subckt port name to port index
 		attr		: Subckt attributes
 		netlist		: Netlist
+		loader		: Netlist location of subckt not yet loaded (lazy mode)
+		_shared		: Subckt is shared by netlists and read-only (netlist.own_subckt to edit)
 	'''
 
+	__slots__ = ('name', '_ports', '_port_ids', '_port_index', '_insts', '_attr', '_net_ids', '_net_names',
+				 '_pins', '_terms', 'netlist', 'loader', '_shared')
+
 	def __init__(self, name, ports, insts, attr):
 		self.name = name
-		self.ports = ports
-		self.insts = sorted(insts, key = lambda inst:inst.name)
-		self.attr = attr
+		self._shared = False
 		self.netlist = None
+		self._net_ids = {}
+		self._net_names = ()
+		self._pins = self._terms = None
+		self.ports = ports
+		self.insts = None if insts == None else sorted(insts, key = lambda inst:inst.name)
+		self._attr = attr
+		self.loader = None
 
 	def __repr__(self):
 		return self.name
 
+	def __getstate__(self):
+		state = {slot: getattr(self, slot) for slot in self.__slots__}
+		state['_pins'] = state['_terms'] = None
+		return None, state
+
+	@property
+	def ports(self):
+		if self.loader:
+			func.load_subckt(self)
+		return self._ports
+
+	@ports.setter
+	def ports(self, ports):
+		self._check_edit()
+		self._ports = ports
+		self._port_ids = self._port_index = None
+		self._edited()
+		if ports != None:
+			self._port_ids = self.get_net_ids(ports)
+			self._port_index = {}
+			for i, port in enumerate(ports):
+				self._port_index.setdefault(port, i)
+
+	@property
+	def port_ids(self):
+		if self.loader:
+			func.load_subckt(self)
+		return self._port_ids
+
+	@property
+	def insts(self):
+		if self.loader:
+			func.load_subckt(self)
+		return self._insts
+
+	@insts.setter
+	def insts(self, insts):
+		self._check_edit()
+		self._insts = None if insts == None else name_list(insts, self)
+		if insts != None:
+			self._insts._bind(self._insts)
+		self._reset_pins()
+
+	@property
+	def attr(self):
+		if self.loader:
+			func.load_subckt(self)
+		return self._attr
+
+	@attr.setter
+	def attr(self, attr):
+		self._check_edit()
+		self._attr = attr
+
 	def get_inst(self, name):
 		'''
 		Description:
@@ -389,35 +1036,111 @@ class subckt():
 		Return:
 			Instance
 		'''
-		l = 0
-		r = len(self.insts) - 1
-		while l <= r:
-			m = round((r - l) / 2) + l
-			if self.insts[m].name == name:
-				return self.insts[m]
-			elif self.insts[m].name >= name:
-				r = m - 1
-			else:
-				l = m + 1
-		return None
+		return self.insts.get(name)
+
+	def get_port_index(self, port):
+		'''
+		Description:
+			Get port index from port name
+		Args:
+			Port name
+		Return:
+			Port index (None if not port)
+		'''
+		if self.loader:
+			func.load_subckt(self)
+		return self._port_index.get(port)
+
+	def get_net_id(self, net):
+		'''
+		Description:
+			Get net id from net name
+		Args:
+			Net name
+		Return:
+			Net id (None if net is not in net table)
+		'''
+		if self.loader:
+			func.load_subckt(self)
+		return self._net_ids.get(net)
+
+	def get_net_ids(self, nets):
+		'''
+		Description:
+			Get net ids from net names (new nets are added into net table)
+		Args:
+			Net names
+		Return:
+			Net id array
+		'''
+		net_ids = self._net_ids
+		return array.array('i', [net_ids.setdefault(net, len(net_ids)) for net in nets])
+
+	def add_net(self, net):
+		'''
+		Description:
+			Add net into net table
+		Args:
+			Net name
+		Return:
+			Net id
+		'''
+		return self._net_ids.setdefault(net, len(self._net_ids))
+
+	def get_net_name(self, net_id):
+		'''
+		Description:
+			Get net name from net id
+		Args:
+			Net id
+		Return:
+			Net name
+		'''
+		return self.get_net_names()[net_id]
+
+	def get_net_names(self):
+		'''
+		Description:
+			Get net names indexed by net id
+		Args:
+		Return:
+			Net names
+		'''
+		if len(self._net_names) != len(self._net_ids):
+			self._net_names = list(self._net_ids)
+		return self._net_names
 
-	def write(self, f):
+	def get_pins(self, net):
+		'''
+		Description:
+			Get instance pins connected to net
+		Args:
+			Net name
+		Return:
+			Instances and terminals
+		'''
+		net_id = self.get_net_id(net)
+		return [] if net_id == None else list(self._get_pins(net_id))
+
+	def write(self, f, renames = None):
 		'''
 		Description:
 			Write subckt into output file
 		Args:
 			File handler
+			Subckt name to written name (None to keep names)
 		Return:
 		'''
-		line = f'.subckt {self.name}'
+		name = renames.get(self.name, self.name) if renames else self.name
+		line = f'.subckt {name}'
 		for port in self.ports:
 			line += ' ' + port
 		for var in self.attr:
 			line += ' ' + var + '=' + self.attr[var]
 		f.write(line + '\n')
 		for inst in self.insts:
-			inst.write(f)
-		f.write('.ends ' + self.name + '\n')
+			inst.write(f, renames)
+		f.write('.ends ' + name + '\n')
 
 	def get_path_from_str(self, path):
 		'''
@@ -452,10 +1175,8 @@ class subckt():
 		Return:
 			Boolean
 		'''
-		for inst in self.insts:
-			if net in inst.nets:
-				return True
-		return False
+		net_id = self.get_net_id(net)
+		return net_id != None and len(self._get_pins(net_id)) > 0
 
 	def replace_net(self, master_net, slave_net):
 		'''
@@ -466,10 +1187,21 @@ class subckt():
 			Net name (slave)
 		Return:
 		'''
-		for inst in self.insts:
-			for i in range(len(inst.nets)):
-				if inst.nets[i] == slave_net:
-					inst.nets[i] = master_net
+		if self.get_net_id(slave_net) != None:
+			self.merge_nets([(master_net, slave_net)], lambda nets: master_net)
+
+	def merge_nets(self, groups, get_win_net = None):
+		'''
+		Description:
+			Merge shorted net groups in one pass (overlapping groups are
+			joined by union-find and each joined group keeps one winner net)
+		Args:
+			Net name groups
+			Winner function (net names -> winner net, default: global nets first, then max name)
+		Return:
+			Old to new net names
+		'''
+		return self._merge_net_ids([self.get_net_ids(group) for group in groups], get_win_net)
 
 	def show(self, scale = 2.5, offset = 0.5, save_path = None):
 		'''
@@ -599,18 +1331,169 @@ class subckt():
 
 	def _get_net_to_inst(self):
 		net_to_inst = {}
-		for inst in self.insts:
-			for i in range(len(inst.nets)):
-				net = inst.nets[i]
-				if str(inst.master) in ['NMOS', 'PMOS'] and i == 3: continue
-				if net not in net_to_inst:
-					net_to_inst[net] = []
-				net_to_inst[net].append((inst, i))
+		self._get_pins(None)
+		for net_id, pins in self._pins.items():
+			pins = [(inst, i) for inst, i in pins if not (str(inst.master) in ['NMOS', 'PMOS'] and i == 3)]
+			if pins:
+				net_to_inst[self.get_net_name(net_id)] = pins
 		return net_to_inst
 
+	def _get_pins(self, net_id):
+		if self._pins == None:
+			self._build_pins()
+		return self._pins.get(net_id, ())
+
+	def _get_inst_terms(self, net_id):
+		if self._terms == None:
+			self._terms = {}
+		elif net_id in self._terms:
+			return self._terms[net_id]
+		inst_terms = {}
+		for inst, term in self._get_pins(net_id):
+			terms = inst_terms.get(inst)
+			if terms == None:
+				inst_terms[inst] = [term]
+			else:
+				terms.append(term)
+				terms.sort()
+		self._terms[net_id] = inst_terms = list(inst_terms.items())
+		return inst_terms
+
+	def _build_pins(self):
+		pins = {}
+		for inst in self.insts:
+			for term, net_id in enumerate(inst.net_ids):
+				if net_id in pins:
+					pins[net_id].append((inst, term))
+				else:
+					pins[net_id] = [(inst, term)]
+		self._pins = pins
+
+	def _reset_pins(self):
+		self._pins = self._terms = None
+		self._edited()
+
+	def _add_pins(self, inst):
+		self._terms = None
+		self._edited()
+		if self._pins != None:
+			for term, net_id in enumerate(inst.net_ids):
+				self._pins.setdefault(net_id, []).append((inst, term))
+
+	def _remove_pins(self, inst):
+		self._terms = None
+		self._edited()
+		if self._pins != None:
+			for term, net_id in enumerate(inst.net_ids):
+				self._pins[net_id].remove((inst, term))
+
+	def _set_pin(self, inst, term, net_id):
+		self._check_edit()
+		term = range(len(inst.net_ids))[term]
+		old_net_id = inst.net_ids[term]
+		inst.net_ids[term] = net_id
+		self._terms = None
+		self._edited()
+		pins = self._pins.get(old_net_id) if self._pins != None else None
+		if pins and old_net_id != net_id and (inst, term) in pins:
+			pins.remove((inst, term))
+			self._pins.setdefault(net_id, []).append((inst, term))
+
+	def _move_pins(self, net_id, new_net_id):
+		if net_id == new_net_id:
+			return
+		self._terms = None
+		self._edited()
+		pins = self._get_pins(net_id)
+		for inst, term in pins:
+			inst.net_ids[term] = new_net_id
+		self._pins.setdefault(new_net_id, []).extend(self._pins.pop(net_id, ()))
+
+	def _merge_net_ids(self, groups, get_win_net = None):
+		self._check_edit()
+		if get_win_net == None:
+			get_win_net = self.netlist._get_win_net if self.netlist != None else max
+		parents = {}
+		def find(net_id):
+			root = net_id
+			while parents.setdefault(root, root) != root:
+				root = parents[root]
+			while parents[net_id] != root:
+				parents[net_id], net_id = root, parents[net_id]
+			return root
+		for net_ids in groups:
+			root = find(net_ids[0]) if net_ids else None
+			for net_id in net_ids[1:]:
+				other = find(net_id)
+				if other != root:
+					parents[other] = root
+		members = {}
+		for net_id in parents:
+			members.setdefault(find(net_id), []).append(net_id)
+		net_names = self.get_net_names()
+		merges = {}
+		for net_ids in members.values():
+			if len(net_ids) == 1:
+				continue
+			nets = [net_names[net_id] for net_id in net_ids]
+			win_net = get_win_net(nets)
+			win_net_id = self.add_net(win_net)
+			for net_id, net in zip(net_ids, nets):
+				if net_id != win_net_id:
+					self._move_pins(net_id, win_net_id)
+					merges[net] = win_net
+		return merges
+
+	def _rename_nets(self, renames):
+		self._check_edit()
+		moves, merges = {}, {}
+		for net, win_net in renames.items():
+			net_id = self.get_net_id(net)
+			if net_id != None:
+				moves[net_id] = self.add_net(win_net)
+				merges[net] = win_net
+		if self._pins == None:
+			self._build_pins()
+		self._terms = None
+		self._edited()
+		pins = {net_id: self._pins.pop(net_id, []) for net_id in moves}
+		for net_id, win_net_id in moves.items():
+			for inst, term in pins[net_id]:
+				inst.net_ids[term] = win_net_id
+			self._pins.setdefault(win_net_id, []).extend(pins[net_id])
+		return merges
+
+	def _copy(self, netlist):
+		if self.loader:
+			func.load_subckt(self)
+		copy = subckt.__new__(subckt)
+		copy.name = self.name
+		copy._ports = None if self._ports == None else list(self._ports)
+		copy._port_ids = None if self._port_ids == None else self._port_ids[:]
+		copy._port_index = None if self._port_index == None else dict(self._port_index)
+		copy._attr = None if self._attr == None else dict(self._attr)
+		copy._net_ids = dict(self._net_ids)
+		copy._net_names = ()
+		copy._pins = copy._terms = None
+		copy.netlist = netlist
+		copy.loader = None
+		copy._shared = False
+		copy._insts = None if self._insts == None else name_list([inst._copy(copy) for inst in self._insts], copy)
+		return copy
+
 	def _sort_inst(self):
 		self.insts = sorted(self.insts, key = lambda inst:inst.name)
 
+	def _edited(self):
+		if self.netlist != None:
+			self.netlist._serial += 1
+
+	def _check_edit(self):
+		if self._shared:
+			raise RuntimeError(f'Subckt is shared and read-only, edit netlist.own_subckt() instead: {self.name}')
+		if self.netlist != None and self.netlist._clones:
+			self.netlist._unshare(self)
+
 # ---------------------------------------------------------------------
 # Class: inst
 # ---------------------------------------------------------------------
@@ -620,38 +1503,762 @@ class inst():
 		Instance with nets and master
 	Props:
 		name		: Instance name
-		nets		: Instance nets
-		subckt		: Subckt containing the instance
+		nets		: Instance nets (view on net ids)
+		net_ids		: Instance net id array (ids in subckt net table)
+		subckt		: Name of subckt containing the instance
 		master		: Subckt that is instantiated
-		attr		: Instance attributes
+		attr		: Instance attributes (read-only, shared by instances with same attributes)
 		is_pri		: Instance is primitive
+		_subckt		: Subckt containing the instance (instance created with subckt
+					  name has own net table until added into subckt instances)
 	'''
 
+	__slots__ = ('name', 'net_ids', '_subckt', '_master', '_attr', '_is_pri')
+
 	def __init__(self, name, nets, subckt, master, attr):
 		self.name = name
-		self.nets = nets
-		self.subckt = subckt
-		self.master = master
-		self.attr = attr
-		self.is_pri = False
+		self._subckt = self._get_free_subckt(subckt) if isinstance(subckt, str) else subckt
+		self.net_ids = self._subckt.get_net_ids(nets)
+		self._master = master
+		self._attr = attr if isinstance(attr, attr_dict) else attr_dict(attr)
+		self._is_pri = False
 
 	def __repr__(self):
 		return self.name
 
-	def write(self, f):
+	@property
+	def subckt(self):
+		return self._subckt.name
+
+	@property
+	def nets(self):
+		return net_list(self)
+
+	@nets.setter
+	def nets(self, nets):
+		self._subckt._check_edit()
+		self.net_ids = self._subckt.get_net_ids(nets)
+		self._subckt._reset_pins()
+
+	@property
+	def master(self):
+		return self._master
+
+	@master.setter
+	def master(self, master):
+		self._subckt._check_edit()
+		self._master = master
+		self._subckt._edited()
+
+	@property
+	def is_pri(self):
+		return self._is_pri
+
+	@is_pri.setter
+	def is_pri(self, is_pri):
+		self._subckt._check_edit()
+		self._is_pri = is_pri
+		self._subckt._edited()
+
+	@property
+	def attr(self):
+		return self._attr
+
+	@attr.setter
+	def attr(self, attr):
+		self._subckt._check_edit()
+		self._attr = attr_dict(attr)
+
+	def set_attr(self, var, val):
+		'''
+		Description:
+			Set instance attribute without touching shared attributes
+		Args:
+			Attribute name
+			Attribute value
+		Return:
+		'''
+		attr = dict(self._attr)
+		attr[sys.intern(var)] = sys.intern(val)
+		self.attr = attr
+
+	def write(self, f, renames = None):
 		'''
 		Description:
 			Write instance into output file
 		Args:
 			File handler
+			Subckt name to written name (None to keep names)
 		Return:
 		'''
-		line = self.name
-		for net in self.nets:
-			line += ' ' + net
-		master = self.attr['val'] if 'val' in self.attr else str(self.master)
-		line += ' ' + master
-		for var in self.attr:
-			if var == 'val': continue
-			line += ' ' + var + '=' + self.attr[var]
-		f.write(line + '\n')
+		net_names = self._subckt.get_net_names()
+		nets = [net_names[net_id] for net_id in self.net_ids]
+		master = self.master
+		if renames and not self.is_pri:
+			master = renames.get(str(master), master)
+		f.write(func.get_inst_line(self.name, nets, master, self.attr))
+
+	def _bind(self, subckt):
+		if self._subckt is not subckt:
+			nets = list(self.nets)
+			self._subckt = subckt
+			self.net_ids = subckt.get_net_ids(nets)
+
+	@staticmethod
+	def _get_free_subckt(name):
+		return subckt(name, [], [], {})
+
+	def _copy(self, subckt):
+		copy = inst.__new__(inst)
+		copy.name = self.name
+		copy.net_ids = self.net_ids[:]
+		copy._subckt = subckt
+		copy._master = self._master
+		copy._attr = self._attr
+		copy._is_pri = self._is_pri
+		return copy
+
+# ---------------------------------------------------------------------
+# Class: net_list
+# ---------------------------------------------------------------------
+class net_list():
+	'''
+	Description:
+		Instance net names backed by instance net ids (list operations
+		are supported, edits other than single terminal assignment
+		rebuild instance nets)
+	Props:
+		inst		: Instance
+	'''
+
+	__slots__ = ('inst',)
+
+	def __init__(self, inst):
+		self.inst = inst
+
+	def __repr__(self):
+		return repr(list(self))
+
+	def __len__(self):
+		return len(self.inst.net_ids)
+
+	def __iter__(self):
+		net_names = self.inst._subckt.get_net_names()
+		return iter([net_names[net_id] for net_id in self.inst.net_ids])
+
+	def __reversed__(self):
+		return reversed(list(self))
+
+	def __getitem__(self, i):
+		net_names = self.inst._subckt.get_net_names()
+		if isinstance(i, slice):
+			return [net_names[net_id] for net_id in self.inst.net_ids[i]]
+		return net_names[self.inst.net_ids[i]]
+
+	def __setitem__(self, i, net):
+		if isinstance(i, slice):
+			self._edit(lambda nets: nets.__setitem__(i, net))
+			return
+		subckt = self.inst._subckt
+		subckt._check_edit()
+		subckt._set_pin(self.inst, i, subckt.add_net(net))
+
+	def __delitem__(self, i):
+		self._edit(lambda nets: nets.__delitem__(i))
+
+	def __contains__(self, net):
+		net_id = self.inst._subckt.get_net_id(net)
+		return net_id != None and net_id in self.inst.net_ids
+
+	def __eq__(self, nets):
+		return list(self) == list(nets)
+
+	def __add__(self, nets):
+		return list(self) + list(nets)
+
+	def __radd__(self, nets):
+		return list(nets) + list(self)
+
+	def __iadd__(self, nets):
+		self.extend(nets)
+		return self
+
+	def __mul__(self, n):
+		return list(self) * n
+
+	__rmul__ = __mul__
+
+	def append(self, net):
+		self._edit(lambda nets: nets.append(net))
+
+	def extend(self, nets):
+		nets = list(nets)
+		self._edit(lambda old: old.extend(nets))
+
+	def insert(self, i, net):
+		self._edit(lambda nets: nets.insert(i, net))
+
+	def remove(self, net):
+		self._edit(lambda nets: nets.remove(net))
+
+	def pop(self, i = -1):
+		return self._edit(lambda nets: nets.pop(i))
+
+	def clear(self):
+		self._edit(lambda nets: nets.clear())
+
+	def reverse(self):
+		self._edit(lambda nets: nets.reverse())
+
+	def sort(self, key = None, reverse = False):
+		self._edit(lambda nets: nets.sort(key = key, reverse = reverse))
+
+	def copy(self):
+		return list(self)
+
+	def count(self, net):
+		'''
+		Description:
+			Get number of terminals connected to net
+		Args:
+			Net name
+		Return:
+			Number of terminals
+		'''
+		net_id = self.inst._subckt.get_net_id(net)
+		return 0 if net_id == None else self.inst.net_ids.count(net_id)
+
+	def index(self, net, start = 0, stop = sys.maxsize):
+		'''
+		Description:
+			Get first terminal connected to net
+		Args:
+			Net name
+			Start terminal
+			Stop terminal
+		Return:
+			Terminal
+		'''
+		net_id = self.inst._subckt.get_net_id(net)
+		if net_id == None:
+			raise ValueError(f'{net} is not in list')
+		return self.inst.net_ids.index(net_id, start, stop)
+
+	def _edit(self, edit):
+		nets = list(self)
+		result = edit(nets)
+		self.inst.nets = nets
+		return result
+
+# ---------------------------------------------------------------------
+# Class: attr_dict
+# ---------------------------------------------------------------------
+class attr_dict(dict):
+	'''
+	Description:
+		Read-only instance attributes shared by instances with same attributes
+		(inst.set_attr or inst.attr assignment gives instance its own copy)
+	Props:
+	'''
+
+	__slots__ = ()
+
+	def __reduce__(self):
+		return (self.__class__, (dict(self),))
+
+	def _read_only(self, *args, **kwargs):
+		raise TypeError('Instance attributes are shared and read-only, use inst.set_attr()')
+
+	__setitem__ = __delitem__ = __ior__ = _read_only
+	update = setdefault = pop = popitem = clear = _read_only
+
+# ---------------------------------------------------------------------
+# Class: name_list
+# ---------------------------------------------------------------------
+class name_list(list):
+	'''
+	Description:
+		List of subckts/instances with name index kept valid across edits
+	Props:
+		owner		: Subckt owning instance list (pin index kept valid, added instances are moved into subckt)
+		_index		: Name to subckt/instance (None until first lookup or after edit)
+		_case		: Index is case-insensitive
+	'''
+
+	__slots__ = ('owner', '_index', '_case')
+
+	def __init__(self, items = (), owner = None):
+		super().__init__(items)
+		self.owner = owner
+		self._index = None
+		self._case = None
+
+	def __reduce__(self):
+		return (self.__class__, (list(self), self.owner))
+
+	def get(self, name):
+		'''
+		Description:
+			Get subckt/instance from name
+		Args:
+			Name
+		Return:
+			Subckt/instance (None if not found)
+		'''
+		if self._index == None or self._case != gv.ignore_case:
+			self._build_index()
+		return self._index.get(name.lower() if self._case else name)
+
+	def append(self, item):
+		self._editing()
+		self._bind([item])
+		super().append(item)
+		if self._index != None:
+			self._index.setdefault(item.name.lower() if self._case else item.name, item)
+		if self.owner != None:
+			self.owner._add_pins(item)
+
+	def extend(self, items):
+		self._editing()
+		items = list(items)
+		self._bind(items)
+		super().extend(items)
+		self._edited()
+
+	def insert(self, i, item):
+		self._editing()
+		self._bind([item])
+		super().insert(i, item)
+		self._edited()
+
+	def remove(self, item):
+		self._editing()
+		super().remove(item)
+		self._index = None
+		if self.owner != None:
+			self.owner._remove_pins(item)
+
+	def pop(self, *args):
+		self._editing()
+		self._edited()
+		return super().pop(*args)
+
+	def clear(self):
+		self._editing()
+		super().clear()
+		self._edited()
+
+	def __setitem__(self, i, item):
+		self._editing()
+		if isinstance(i, slice):
+			item = list(item)
+			self._bind(item)
+		else:
+			self._bind([item])
+		super().__setitem__(i, item)
+		self._edited()
+
+	def __delitem__(self, i):
+		self._editing()
+		super().__delitem__(i)
+		self._edited()
+
+	def __iadd__(self, items):
+		self.extend(items)
+		return self
+
+	def _editing(self):
+		if self.owner != None:
+			self.owner._check_edit()
+
+	def _edited(self):
+		self._index = None
+		if self.owner != None:
+			self.owner._reset_pins()
+
+	def _bind(self, items):
+		if self.owner != None:
+			for item in items:
+				item._bind(self.owner)
+
+	def _build_index(self):
+		self._case = gv.ignore_case
+		index = {}
+		for item in self:
+			index.setdefault(item.name.lower() if self._case else item.name, item)
+		self._index = index
+
+# ---------------------------------------------------------------------
+# Class: node_index
+# ---------------------------------------------------------------------
+class node_index():
+	'''
+	Description:
+		Electrical node index built bottom-up by union-find over port connections
+		(each subckt is solved once, hierarchy is not flattened)
+	Props:
+		netlist		: Netlist
+		serial		: Netlist edit serial at build time
+		base		: First node id (node ids are not reused by rebuilt index)
+		globals		: Global nets at build time
+		roots		: Subckt to net root ids (net id -> root net id)
+		members		: Subckt to root net id to net ids
+		exits		: Subckt to root net id to first port index
+		root_globals: Subckt to root net id to global net
+		summaries	: Subckt to port groups and port global nets
+		nodes		: Node key to node id
+		memo		: Net path to node id
+	'''
+
+	def __init__(self, netlist, base = 0):
+		self.netlist = netlist
+		self.serial = netlist._serial
+		self.base = base
+		self.globals = list(netlist.globals)
+		self.roots, self.members, self.exits, self.root_globals = {}, {}, {}, {}
+		self.summaries, self.nodes, self.memo = {}, {}, {}
+		for subckt in self._get_bottom_up():
+			self._build_subckt(subckt)
+
+	def is_valid(self):
+		'''
+		Description:
+			Check if node index is up to date with netlist edits
+		Args:
+		Return:
+			Boolean
+		'''
+		return self.serial == self.netlist._serial and self.globals == self.netlist.globals
+
+	def get_node(self, net_path):
+		'''
+		Description:
+			Get electrical node id of net path
+		Args:
+			Net path
+		Return:
+			Node id (None if net path is invalid)
+		'''
+		key = tuple(net_path)
+		node = self.memo.get(key)
+		if node == None:
+			node_key = self._get_node_key(net_path)
+			if node_key == None:
+				return None
+			node = self.nodes.setdefault(node_key, self.base + len(self.nodes))
+			self.memo[key] = node
+		return node
+
+	def get_node_paths(self, net_path):
+		'''
+		Description:
+			Get all net paths on same electrical node
+		Args:
+			Net path
+		Return:
+			Generator of net paths
+		'''
+		node_key = self._get_node_key(net_path)
+		if node_key == None:
+			return
+		elif isinstance(node_key, str):
+			def expand(state):
+				path, subckt = state
+				root_globals = self.root_globals[subckt]
+				for root in root_globals:
+					if root_globals[root] == node_key:
+						for root_path in self._get_root_paths(path, subckt, root):
+							yield True, root_path
+				for inst in subckt.insts:
+					if not inst.is_pri and inst.master in self.roots:
+						yield False, (path + (inst,), inst.master)
+			yield from func.walk(((), self.netlist.top_subckt), expand)
+		else:
+			def expand(state):
+				path, subckt, root = state
+				lowers = {}
+				for net_id in self.members[subckt][root]:
+					for inst, term in subckt._get_pins(net_id):
+						if not inst.is_pri and inst.master in self.roots:
+							lower_root = self.roots[inst.master][inst.master.port_ids[term]]
+							lowers.setdefault((inst, lower_root), None)
+				for root_path in self._get_root_paths(path, subckt, root):
+					yield True, root_path
+				for inst, lower_root in lowers:
+					yield False, (path + (inst,), inst.master, lower_root)
+			path, root = node_key
+			subckt = path[-1].master if path else self.netlist.top_subckt
+			yield from func.walk((path, subckt, root), expand)
+
+	def _get_root_paths(self, path, subckt, root):
+		port_ids = subckt.port_ids
+		for net_id in self.members[subckt][root]:
+			if subckt._get_pins(net_id) or net_id in port_ids:
+				yield path + (subckt.get_net_name(net_id),)
+
+	def _get_node_key(self, net_path):
+		if not net_path or not isinstance(net_path[-1], str):
+			return None
+		l = len(net_path) - 1
+		subckt = net_path[-2].master if l else self.netlist.top_subckt
+		net_id = subckt.get_net_id(net_path[-1])
+		if net_id == None or subckt not in self.roots:
+			return None
+		while True:
+			root = self.roots[subckt][net_id]
+			if root in self.root_globals[subckt]:
+				return self.root_globals[subckt][root]
+			port = self.exits[subckt].get(root)
+			if port == None or l == 0:
+				return tuple(net_path[:l]), root
+			inst = net_path[l - 1]
+			net_id, subckt = inst.net_ids[port], inst._subckt
+			l -= 1
+
+	def _get_bottom_up(self):
+		order, seen = [], set()
+		for subckt in self.netlist.subckts:
+			if subckt in seen:
+				continue
+			seen.add(subckt)
+			stack = [(subckt, self._get_masters(subckt))]
+			while stack:
+				upper, masters = stack[-1]
+				for master in masters:
+					if master not in seen:
+						seen.add(master)
+						stack.append((master, self._get_masters(master)))
+						break
+				else:
+					stack.pop()
+					order.append(upper)
+		return order
+
+	def _get_masters(self, subckt):
+		return iter(dict.fromkeys([inst.master for inst in subckt.insts if not inst.is_pri]))
+
+	def _build_subckt(self, subckt):
+		insts = subckt.insts
+		net_ids = subckt._net_ids
+		parent = list(range(len(net_ids)))
+
+		def find(i):
+			while parent[i] != i:
+				parent[i] = parent[parent[i]]
+				i = parent[i]
+			return i
+
+		def union(i, j):
+			i, j = find(i), find(j)
+			if i != j:
+				parent[max(i, j)] = min(i, j)
+
+		# union nets shorted inside lower-level subckts
+		globals = {net: net_ids[net] for net in self.globals if net in net_ids}
+		for inst in insts:
+			if inst.is_pri or inst.master not in self.summaries:
+				continue
+			groups, port_globals = self.summaries[inst.master]
+			inst_net_ids = inst.net_ids
+			for group in groups:
+				for port in group[1:]:
+					union(inst_net_ids[group[0]], inst_net_ids[port])
+			for port, net in port_globals:
+				if net in globals:
+					union(globals[net], inst_net_ids[port])
+				else:
+					globals[net] = inst_net_ids[port]
+
+		# net roots, members and global nets
+		roots = array.array('i', [find(i) for i in range(len(parent))])
+		members = {}
+		for net_id, root in enumerate(roots):
+			members.setdefault(root, []).append(net_id)
+		root_globals = {}
+		for net in sorted(globals):
+			root_globals.setdefault(roots[globals[net]], net)
+
+		# port summary for upper-level subckts
+		exits, groups = {}, {}
+		for port, net_id in enumerate(subckt.port_ids):
+			exits.setdefault(roots[net_id], port)
+			groups.setdefault(roots[net_id], []).append(port)
+		port_globals = [(port, root_globals[roots[net_id]]) for port, net_id in enumerate(subckt.port_ids)
+						if roots[net_id] in root_globals]
+		self.roots[subckt], self.members[subckt] = roots, members
+		self.exits[subckt], self.root_globals[subckt] = exits, root_globals
+		self.summaries[subckt] = ([group for group in groups.values() if len(group) > 1], port_globals)
+
+# ---------------------------------------------------------------------
+# Class: pri_table
+# ---------------------------------------------------------------------
+class pri_table():
+	'''
+	Description:
+		Flattened primitives as NumPy arrays (struct of arrays) filled in
+		blocks during hierarchy expansion (primitives grouped by subckt)
+	Props:
+		master		: Master code per primitive (index into masters)
+		masters		: Master names
+		nodes		: Node ids per primitive terminal (-1 if master has fewer terminals)
+		w			: W per primitive (nan if missing or not numeric)
+		l			: L per primitive (nan if missing or not numeric)
+		val			: Value per primitive (nan if missing or not numeric)
+		path		: Instance path id per primitive (index into paths)
+		name		: Name id per primitive (index into names)
+		node_path	: Instance path id per node (index into paths)
+		node_name	: Name id per node (index into names)
+		paths		: Instance path strings ('' for top-level, ending with delimiter)
+		names		: Primitive/net names
+		deli		: Hierarchy delimiter
+		_nodes		: Path and name to path id and name id (None until first lookup)
+	'''
+
+	def __init__(self, netlist):
+		try:
+			import numpy as np
+		except ImportError:
+			raise ImportError('Exporting primitive table requires numpy package') from None
+		self.masters, self.paths, self.names = [], [''], []
+		self.deli = netlist.deli
+		self._nodes = None
+		masters, names, globals, values = {}, {}, {}, {}
+		for net in netlist.globals:
+			globals.setdefault(net, len(globals))
+			names.setdefault(net, len(names))
+
+		# subckt templates
+		templates, pri_num, node_num, term_num = {}, 0, len(globals), 0
+		inst_nums = netlist._get_inst_counts()
+		for subckt in netlist.subckts:
+			inst_num = inst_nums.get(subckt.name, 0)
+			if inst_num == 0:
+				continue
+			pris = [inst for inst in subckt.insts if inst.is_pri]
+			net_names = subckt.get_net_names()
+			ports = set(subckt.port_ids) if subckt.name else set()
+			inners = [net_id for net_id, net in enumerate(net_names) if net_id not in ports and net not in globals]
+			global_ids = [(net_id, globals[net]) for net_id, net in enumerate(net_names) if net in globals and net_id not in ports]
+			attrs = []
+			for inst in pris:
+				if id(inst.attr) not in values:
+					attr = inst.attr
+					values[id(inst.attr)] = [func.get_spice_value(attr.get(var, attr.get(var.upper()))) for var in ['w', 'l', 'val']]
+				attrs.append(values[id(inst.attr)])
+			term_num = max([term_num] + [len(inst.net_ids) for inst in pris])
+			templates[subckt] = (pris, attrs, inners, global_ids)
+			pri_num += inst_num * len(pris)
+			node_num += inst_num * len(inners)
+
+		# template arrays (lower instances grouped by master)
+		for subckt, (pris, attrs, inners, global_ids) in templates.items():
+			codes = np.array([masters.setdefault(str(inst.master), len(masters)) for inst in pris], np.int32)
+			nets = np.full((len(pris), term_num), -1, np.int32)
+			for i, inst in enumerate(pris):
+				nets[i, :len(inst.net_ids)] = inst.net_ids
+			attrs = np.array(attrs, np.float64).reshape(len(pris), 3)
+			pri_names = np.array([names.setdefault(inst.name, len(names)) for inst in pris], np.int32)
+			net_names = subckt.get_net_names()
+			inner_names = np.array([names.setdefault(net_names[net_id], len(names)) for net_id in inners], np.int32)
+			inners = np.array(inners, np.int32)
+			global_ids = (np.array([net_id for net_id, _ in global_ids], np.int32), np.array([node for _, node in global_ids], np.int32))
+			groups = {}
+			for inst in subckt.insts:
+				if not inst.is_pri:
+					groups.setdefault((inst.master, len(inst.net_ids)), []).append(inst)
+			groups = [(master, [inst.name for inst in insts], np.array([inst.net_ids for inst in insts], np.int32).reshape(len(insts), port_num),
+					   np.array(master.port_ids, np.int32)) for (master, port_num), insts in groups.items()]
+			templates[subckt] = (codes, nets, attrs, pri_names, inners, inner_names, global_ids, groups, len(net_names))
+		self.masters = list(masters)
+		self.names = list(names)
+
+		# preallocated arrays
+		self.master = np.empty(pri_num, np.int32)
+		self.nodes = np.empty((pri_num, term_num), np.int32)
+		self.w, self.l, self.val = np.empty(pri_num), np.empty(pri_num), np.empty(pri_num)
+		self.path, self.name = np.empty(pri_num, np.int32), np.empty(pri_num, np.int32)
+		self.node_path, self.node_name = np.empty(node_num, np.int32), np.empty(node_num, np.int32)
+		self.node_path[:len(globals)] = 0
+		self.node_name[:len(globals)] = np.arange(len(globals), dtype = np.int32)
+
+		# top-down expansion (all instances of one master under one subckt batch are filled at once)
+		pri_at, node_at, deli = 0, len(globals), self.deli
+		top_ids = np.full((1, len(netlist.top_subckt.get_net_names()) + 1), -1, np.int32)
+		stack = [(netlist.top_subckt, np.zeros(1, np.int32), top_ids)]
+		while stack:
+			subckt, path_ids, ids = stack.pop()
+			codes, nets, attrs, pri_names, inners, inner_names, global_ids, groups, _ = templates[subckt]
+			batch, end = len(path_ids), node_at + len(path_ids) * len(inners)
+			ids[:, global_ids[0]] = global_ids[1]
+			ids[:, inners] = np.arange(node_at, end, dtype = np.int32).reshape(batch, len(inners))
+			self.node_path[node_at:end] = np.repeat(path_ids, len(inners))
+			self.node_name[node_at:end] = np.tile(inner_names, batch)
+			node_at, end = end, pri_at + batch * len(codes)
+			self.master[pri_at:end] = np.tile(codes, batch)
+			self.nodes[pri_at:end] = ids[:, nets].reshape(-1, term_num)
+			self.w[pri_at:end] = np.tile(attrs[:, 0], batch)
+			self.l[pri_at:end] = np.tile(attrs[:, 1], batch)
+			self.val[pri_at:end] = np.tile(attrs[:, 2], batch)
+			self.path[pri_at:end] = np.repeat(path_ids, len(codes))
+			self.name[pri_at:end] = np.tile(pri_names, batch)
+			pri_at = end
+			prefixes = [self.paths[path_id] for path_id in path_ids]
+			for master, inst_names, conns, port_ids in groups:
+				lower_path_ids = np.arange(len(self.paths), len(self.paths) + batch * len(inst_names), dtype = np.int32)
+				self.paths += [prefix + name + deli for prefix in prefixes for name in inst_names]
+				lower_ids = np.full((len(lower_path_ids), templates[master][-1] + 1), -1, np.int32)
+				lower_ids[:, port_ids] = ids[:, conns].reshape(len(lower_path_ids), len(port_ids))
+				stack.append((master, lower_path_ids, lower_ids))
+
+	def get_name(self, i):
+		'''
+		Description:
+			Get hierarchical primitive name
+		Args:
+			Primitive index
+		Return:
+			Primitive name
+		'''
+		return self.paths[self.path[i]] + self.names[self.name[i]]
+
+	def get_node_name(self, node):
+		'''
+		Description:
+			Get canonical node name (top-most net on node, global net name for global nodes)
+		Args:
+			Node id
+		Return:
+			Node name
+		'''
+		return self.paths[self.node_path[node]] + self.names[self.node_name[node]]
+
+	def get_node(self, node_name):
+		'''
+		Description:
+			Get node id from canonical node name
+		Args:
+			Node name
+		Return:
+			Node id (None if not found)
+		'''
+		if self._nodes == None:
+			self._nodes = ({path: i for i, path in enumerate(self.paths)}, {name: i for i, name in enumerate(self.names)})
+		paths, names = self._nodes
+		for at in [0] + [i + 1 for i, c in enumerate(node_name) if c == self.deli]:
+			path_id, name_id = paths.get(node_name[:at]), names.get(node_name[at:])
+			if path_id != None and name_id != None:
+				nodes = ((self.node_path == path_id) & (self.node_name == name_id)).nonzero()[0]
+				if len(nodes):
+					return int(nodes[0])
+		return None
+
+	def get_master_code(self, master):
+		'''
+		Description:
+			Get master code from master name
+		Args:
+			Master name
+		Return:
+			Master code (-1 if not found)
+		'''
+		return self.masters.index(master) if master in self.masters else -1
@@ -18,112 +18,557 @@
 # Date			: 2025/08/01
 # Description	: Read spice netlist into Python object (function only)
 # =====================================================================
-import re, schemdraw
+import os, io, re, gc, sys, bz2, gzip, lzma, array, warnings, contextlib, schemdraw
+import concurrent.futures as cf
 import schemdraw.elements as elm
 import rdnl.core as core
 import rdnl.globalvar as gv
 
 # ---------------------------------------------------------------------
-# process netlist
+# get netlist codec
 # ---------------------------------------------------------------------
-def proc_netlist(file_path, tmp_file_path, rowcmt = '*', inline = '$'):
-	f = open(tmp_file_path, 'w')
-	for line in open(file_path, 'r'):
-		if inline in line:
-			line = line[:line.index(inline)]
-		new_line = line.startswith('+')
+def get_codec(file_path):
+	with open(file_path, 'rb') as f:
+		head = f.read(6)
+	for magic in gv.codec_magic:
+		if head.startswith(magic):
+			return gv.codec_magic[magic]
+	return None
+
+# ---------------------------------------------------------------------
+# open netlist
+# ---------------------------------------------------------------------
+def open_netlist(file_path, mode = 'r'):
+	codec = get_codec(file_path)
+	if codec == None:
+		return open(file_path, mode)
+	elif codec == 'gzip':
+		f = gzip.open(file_path, 'rb')
+	elif codec == 'bz2':
+		f = bz2.open(file_path, 'rb')
+	elif codec == 'xz':
+		f = lzma.open(file_path, 'rb')
+	elif codec == 'zstd':
+		f = open_zstd(file_path)
+	return f if mode == 'rb' else io.TextIOWrapper(f)
+
+# ---------------------------------------------------------------------
+# open zstd netlist
+# ---------------------------------------------------------------------
+def open_zstd(file_path):
+	try:
+		from compression import zstd
+		return zstd.open(file_path, 'rb')
+	except ImportError:
+		pass
+	try:
+		import zstandard
+	except ImportError:
+		raise ImportError(f'Reading zstd netlist requires zstandard package: {file_path}') from None
+	reader = zstandard.ZstdDecompressor().stream_reader(open(file_path, 'rb'), read_across_frames = True)
+	return io.BufferedReader(reader)
+
+# ---------------------------------------------------------------------
+# read netlist lines
+# ---------------------------------------------------------------------
+def rd_netlist_lines(f, rowcmt = '*', inline = '$'):
+	line = ''
+	for row in f:
+		if inline in row:
+			row = row[:row.index(inline)]
+		new_line = row.startswith('+')
 		if new_line:
-			line = line[1:]
-		line = line.strip()
-		if line.startswith(rowcmt) or not line:
+			row = row[1:]
+		row = row.strip()
+		if row.startswith(rowcmt) or not row:
 			continue
-		line = re.sub(r'\s+', ' ', line)
-		f.write('\n' * (not new_line) + ' ' * new_line + line)
-	f.close()
+		row = ' '.join(row.split())
+		if new_line:
+			line += ' ' + row
+		else:
+			if line:
+				yield line
+			line = row
+	if line:
+		yield line
+
+# ---------------------------------------------------------------------
+# process netlist
+# ---------------------------------------------------------------------
+def proc_netlist(file_path, tmp_file_path, rowcmt = '*', inline = '$'):
+	with open_netlist(file_path) as f, open(tmp_file_path, 'w') as tmp_f:
+		for line in rd_netlist_lines(f, rowcmt, inline):
+			tmp_f.write('\n' + line)
+
+# ---------------------------------------------------------------------
+# read line words
+# ---------------------------------------------------------------------
+def rd_line_words(lines):
+	directive = gv.directive
+	for line in lines:
+		words = line.split()
+		if line[0] == '.':
+			kind = directive.get(words[0].lower(), 'inst')
+			if kind != 'subckt' or len(words) > 1:
+				yield kind, words
+				continue
+		yield 'inst', words
 
 # ---------------------------------------------------------------------
 # read subckt line
 # ---------------------------------------------------------------------
 def rd_subckt_line(words):
-	name, ports, attr = words[1], [], {}
+	intern = sys.intern
+	name, ports, attr = intern(words[1]), [], {}
 	for word in words[2:]: 
 		if '=' in word:
-			var, val = word.split('=')
-			attr[var] = val
+			var, _, val = word.partition('=')
+			attr[intern(var)] = intern(val)
 		else:
-			ports.append(word)
+			ports.append(intern(word))
 	return name, ports, attr
 
 # ---------------------------------------------------------------------
 # read instance line
 # ---------------------------------------------------------------------
 def rd_inst_line(words):
-	name, nets, master, attr = words[0], [], None, {}
 	l = len(words)
-	for i in range(1, l):
-		word = words[i]
-		if not master and (i < l - 1 and '=' in words[i + 1] or i == l - 1):
-			master = word
-		elif '=' in word:
-			var, val = word.split('=')
-			attr[var] = val
+	if l < 2:
+		return words[0], [], None, {}
+	k = 2
+	while k < l and '=' not in words[k]:
+		k += 1
+	intern = sys.intern
+	name, master, attr = words[0], intern(words[k - 1]), {}
+	nets = [intern(net) for net in words[1:k - 1]]
+	if nets and '=' in nets[0]:
+		var, _, val = nets.pop(0).partition('=')
+		attr[intern(var)] = intern(val)
+	for word in words[k:]:
+		if '=' in word:
+			var, _, val = word.partition('=')
+			attr[intern(var)] = intern(val)
 		else:
-			nets.append(word)
+			nets.append(intern(word))
 	return name, nets, master, attr
 
+# ---------------------------------------------------------------------
+# get instance fields
+# ---------------------------------------------------------------------
+def get_inst_fields(words):
+	inst_name, inst_nets, inst_master, inst_attr = rd_inst_line(words)
+	fst_char = inst_name[0]
+	if fst_char in gv.linear_element:
+		inst_attr['val'] = inst_master
+		inst_master = gv.linear_element[fst_char]
+	return inst_name, inst_nets, inst_master, inst_attr
+
+# ---------------------------------------------------------------------
+# get instance line
+# ---------------------------------------------------------------------
+def get_inst_line(name, nets, master, attr):
+	line = name
+	for net in nets:
+		line += ' ' + net
+	line += ' ' + (attr['val'] if 'val' in attr else str(master))
+	for var in attr:
+		if var == 'val': continue
+		line += ' ' + var + '=' + attr[var]
+	return line + '\n'
+
+# ---------------------------------------------------------------------
+# get spice numeric value
+# ---------------------------------------------------------------------
+spice_value = re.compile(r'([+-]?(?:\d+\.?\d*|\.\d+)(?:e[+-]?\d+)?)(meg|mil|[tgkmunpfa])?[a-z]*$', re.I)
+
+def get_spice_value(text):
+	match = spice_value.match(text) if text != None else None
+	if match == None:
+		return float('nan')
+	value, unit = match.groups()
+	return float(value) * gv.unit_scale[unit.lower()] if unit else float(value)
+
+# ---------------------------------------------------------------------
+# get shared attributes
+# ---------------------------------------------------------------------
+def get_shared_attr(attr, attrs):
+	key = tuple(attr.items())
+	shared = attrs.get(key)
+	if shared == None:
+		shared = attrs[key] = core.attr_dict(attr)
+	return shared
+
+# ---------------------------------------------------------------------
+# iterate netlist events
+# ---------------------------------------------------------------------
+def iter_netlist_events(lines):
+	subckt_name = None
+	for kind, words in rd_line_words(lines):
+		if kind == 'inst':
+			yield ('inst',) + get_inst_fields(words)
+		elif kind == 'subckt':
+			subckt_name, subckt_ports, subckt_attr = rd_subckt_line(words)
+			yield 'subckt', subckt_name, subckt_ports, subckt_attr
+		elif kind == 'ends':
+			if subckt_name != None:
+				yield 'ends', subckt_name
+			subckt_name = None
+		elif kind == 'global':
+			yield 'global', words[1:]
+		elif kind == 'include' and len(words) > 1:
+			yield 'include', words[1].strip('\'"'), None
+		elif kind == 'lib' and len(words) > 2:
+			yield 'include', words[1].strip('\'"'), words[2]
+		elif kind == 'lib' and len(words) == 2:
+			yield 'lib', words[1]
+		elif kind == 'endl':
+			yield ('endl',)
+
 # ---------------------------------------------------------------------
 # parse netlist
 # ---------------------------------------------------------------------
-def parse_netlist(file_path, orig_file_path):
-	subckts = {}
+def parse_netlist(lines, file_path, subckts = None, rowcmt = '*', inline = '$'):
+	events = iter_netlist_events(lines)
+	return parse_netlist_events(events, file_path, subckts, rowcmt, inline)
+
+# ---------------------------------------------------------------------
+# parse netlist events
+# ---------------------------------------------------------------------
+def parse_netlist_events(events, file_path, subckts = None, rowcmt = '*', inline = '$'):
+	subckts = subckts if subckts else {}
 	top_subckt = core.subckt('', [], [], {})
-	netlist = core.netlist(orig_file_path, [], top_subckt, [])
-	rd_subckt, subckt, subckt_name = False, top_subckt, ''
-	for line in open(file_path, 'r'):
-		line = line.strip('\n')
-		words = line.split()
+	netlist = core.netlist(file_path, [], top_subckt, [])
+	subckt, subckt_name, attrs = top_subckt, '', {}
+	with no_gc():
+		for event in events:
+			kind = event[0]
 
-		# start subckt
-		if re.search(r'^\.subckt\s+\w+', line, re.IGNORECASE):
-			rd_subckt = True
-			subckt_name, subckt_ports, subckt_attr = rd_subckt_line(words)
-			subckt = core.subckt(subckt_name, subckt_ports, [], subckt_attr)
+			# instance
+			if kind == 'inst':
+				_, inst_name, inst_nets, inst_master, inst_attr = event
+				inst_attr = get_shared_attr(inst_attr, attrs)
+				inst = core.inst(inst_name, inst_nets, subckt, inst_master, inst_attr)
+				subckt.insts.append(inst)
 
-		# end subckt
-		elif re.search(r'^\.ends\s+' + subckt_name, line, re.IGNORECASE):
-			subckt._sort_inst()
-			subckts[subckt_name] = subckt
-			rd_subckt, subckt, subckt_name = False, top_subckt, ''
+			# start subckt
+			elif kind == 'subckt':
+				_, subckt_name, subckt_ports, subckt_attr = event
+				subckt = core.subckt(subckt_name, subckt_ports, [], subckt_attr)
 
-		# global
-		elif re.search(r'^\.global\s+' + subckt_name, line, re.IGNORECASE):
-			netlist.globals += words[1:]
+			# end subckt
+			elif kind == 'ends':
+				subckt._sort_inst()
+				subckts[subckt_name] = subckt
+				subckt, subckt_name = top_subckt, ''
 
-		# instance
-		else:
-			inst_name, inst_nets, inst_master, inst_attr = rd_inst_line(words)
-			fst_char = inst_name[0]
-			if fst_char in gv.linear_element:
-				inst_attr['val'] = inst_master
-				inst_master = gv.linear_element[fst_char]
-			inst = core.inst(inst_name, inst_nets, subckt_name, inst_master, inst_attr)
-			subckt.insts.append(inst)
+			# global
+			elif kind == 'global':
+				netlist.globals += event[1]
+
+			# include
+			elif kind == 'include':
+				_, lib_path, section = event
+				lib_path = os.path.join(os.path.dirname(file_path), lib_path)
+				netlist.includes.append((os.path.realpath(lib_path), section))
 
 	# connect netlist
 	top_subckt._sort_inst()
 	subckts[''] = top_subckt
-	netlist.subckts = subckts.values()
+	local_subckts = list(subckts.values())
+	for lib_path, section in netlist.includes:
+		lib = read_lib(lib_path, section, rowcmt, inline)
+		netlist.libs.append(lib)
+		if lib == None:
+			continue
+		for subckt in lib.subckts:
+			if subckt.name and subckt.name not in subckts:
+				subckts[subckt.name] = subckt
+		for net in lib.globals:
+			if net not in netlist.globals:
+				netlist.globals.append(net)
+		if lib.top_subckt.insts:
+			warnings.warn(f'Top-level instances of included netlist are ignored: {lib_path}', RuntimeWarning)
+	netlist.subckts = list(subckts.values())
 	netlist._sort_subckt()
+	for subckt in local_subckts:
+		if subckt.loader:
+			subckt.netlist = netlist
+		else:
+			conn_subckt(netlist, subckt)
+	return netlist
+
+# ---------------------------------------------------------------------
+# read library
+# ---------------------------------------------------------------------
+def read_lib(file_path, section = None, rowcmt = '*', inline = '$'):
+	file_path = os.path.realpath(file_path)
+	key = (file_path, section.lower() if section else None, rowcmt, inline)
+	stat = os.stat(file_path)
+	stamp = (stat.st_size, stat.st_mtime_ns)
+	if key in gv.lib_cache:
+		lib_stamp, lib = gv.lib_cache[key]
+		if lib_stamp == None or lib_stamp == stamp:
+			return lib
+	gv.lib_cache[key] = (None, None)
+	try:
+		with open_netlist(file_path) as f:
+			events = iter_netlist_events(rd_netlist_lines(f, rowcmt, inline))
+			if section:
+				events = filter_lib_section(events, section)
+			lib = parse_netlist_events(events, file_path, None, rowcmt, inline)
+	except Exception:
+		del gv.lib_cache[key]
+		raise
+	lib.lib = key
+	for subckt in lib.subckts:
+		subckt._shared = True
+	gv.lib_cache[key] = (stamp, lib)
+	return lib
+
+# ---------------------------------------------------------------------
+# filter library section
+# ---------------------------------------------------------------------
+def filter_lib_section(events, section):
+	in_section, section = False, section.lower()
+	for event in events:
+		if event[0] == 'lib':
+			in_section = event[1].lower() == section
+		elif event[0] == 'endl':
+			in_section = False
+		elif in_section:
+			yield event
+
+# ---------------------------------------------------------------------
+# get library paths
+# ---------------------------------------------------------------------
+def get_lib_paths(netlist):
+	paths = [lib_path for lib_path, _ in netlist.includes]
 	for subckt in netlist.subckts:
-		for inst in subckt.insts:
-			master = netlist.get_subckt(inst.master)
-			if master != None:
-				inst.master = master
+		if subckt.netlist != None and subckt.netlist.lib:
+			paths.append(subckt.netlist.path)
+	return list(dict.fromkeys(paths))
+
+# ---------------------------------------------------------------------
+# connect subckt
+# ---------------------------------------------------------------------
+def conn_subckt(netlist, subckt):
+	for inst in subckt.insts:
+		master = netlist.subckts.get(inst._master)
+		if master != None:
+			inst._master = master
+		else:
+			inst._is_pri = True
+	subckt.netlist = netlist
+
+# ---------------------------------------------------------------------
+# index netlist
+# ---------------------------------------------------------------------
+def index_netlist(f, rowcmt = '*', inline = '$'):
+	index, rows, header = {}, [], None
+	start, pos = None, 0
+	cmt = rowcmt.encode()
+	for row in f:
+		end = pos + len(row)
+		if header != None:
+			body = row.strip()
+			if row.startswith(b'+') or body.startswith(cmt) or not body:
+				header.append(row.decode())
+				pos = end
+				continue
+			line = next(rd_netlist_lines(header, rowcmt, inline))
+			name, header = line.split()[1], None
+		fst_char = row[:1]
+		if fst_char == b'.' or fst_char in b' \t' and row.lstrip()[:1] == b'.':
+			word = row.lstrip()[:7].lower()
+			if word.startswith(b'.subckt'):
+				header, start = [row.decode()], pos
+			elif word.startswith(b'.ends') and start != None:
+				index[name] = (start, end)
+				start = None
+			elif start == None or word.startswith(b'.global'):
+				rows.append(row.decode())
+		elif start == None:
+			rows.append(row.decode())
+		pos = end
+	return index, rows
+
+# ---------------------------------------------------------------------
+# parse netlist lazily
+# ---------------------------------------------------------------------
+def parse_lazy_netlist(f, file_path, rowcmt = '*', inline = '$'):
+	index, rows = index_netlist(f, rowcmt, inline)
+	stat = os.fstat(f.fileno())
+	subckts = {}
+	for name in index:
+		subckt = core.subckt(name, None, None, None)
+		start, end = index[name]
+		subckt.loader = (file_path, stat.st_mtime_ns, start, end, rowcmt, inline)
+		subckts[name] = subckt
+	lines = rd_netlist_lines(rows, rowcmt, inline)
+	return parse_netlist(lines, file_path, subckts, rowcmt, inline)
+
+# ---------------------------------------------------------------------
+# load subckt
+# ---------------------------------------------------------------------
+def load_subckt(subckt):
+	file_path, mtime, start, end, rowcmt, inline = subckt.loader
+	subckt.loader, shared, subckt._shared = None, subckt._shared, False
+	netlist, subckt.netlist = subckt.netlist, None
+	with open(file_path, 'rb') as f:
+		if os.fstat(f.fileno()).st_mtime_ns != mtime:
+			raise RuntimeError(f'Netlist changed after indexing: {file_path}')
+		f.seek(start)
+		rows = f.read(end - start).decode().splitlines()
+	events = iter_netlist_events(rd_netlist_lines(rows, rowcmt, inline))
+	_, _, subckt.ports, subckt.attr = next(events)
+	insts, attrs = [], {}
+	for event in events:
+		if event[0] == 'ends':
+			break
+		elif event[0] == 'inst':
+			_, inst_name, inst_nets, inst_master, inst_attr = event
+			inst_attr = get_shared_attr(inst_attr, attrs)
+			insts.append(core.inst(inst_name, inst_nets, subckt, inst_master, inst_attr))
+	subckt.insts = insts
+	subckt._sort_inst()
+	conn_subckt(netlist, subckt)
+	subckt._shared = shared
+
+# ---------------------------------------------------------------------
+# read netlist chunk rows
+# ---------------------------------------------------------------------
+def rd_chunk_rows(f, start, end):
+	f.seek(max(start - 1, 0))
+	if start > 0:
+		f.readline()
+	pos, skip = f.tell(), start > 0
+	for row in f:
+		if row.lstrip()[:7].lower() == b'.subckt':
+			if end != None and pos >= end:
+				return
+			skip = False
+		if not skip:
+			yield row.decode()
+		pos += len(row)
+
+# ---------------------------------------------------------------------
+# parse netlist chunk
+# ---------------------------------------------------------------------
+def parse_netlist_chunk(file_path, start, end, rowcmt = '*', inline = '$'):
+	subckts, top_events, subckt, attrs = [], [], None, {}
+	with open(file_path, 'rb') as f:
+		lines = rd_netlist_lines(rd_chunk_rows(f, start, end), rowcmt, inline)
+		for event in iter_netlist_events(lines):
+			kind = event[0]
+			if kind == 'subckt':
+				subckt = event[1:] + ([],)
+			elif kind == 'ends':
+				subckts.append(pack_chunk_subckt(*subckt, attrs))
+				subckt = None
+			elif subckt and kind == 'inst':
+				subckt[3].append(event[1:])
 			else:
-				inst.is_pri = True
-		subckt.netlist = netlist
+				top_events.append(event)
+	return subckts, list(attrs.values()), top_events
+
+# ---------------------------------------------------------------------
+# pack chunk subckt into net table and id arrays
+# ---------------------------------------------------------------------
+def pack_chunk_subckt(name, ports, attr, fields, attrs):
+	net_ids = {}
+	for port in ports:
+		net_ids.setdefault(port, len(net_ids))
+	inst_names, masters, attr_ids, nets, net_nums = [], [], array.array('i'), array.array('i'), array.array('i')
+	for inst_name, inst_nets, inst_master, inst_attr in sorted(fields, key = lambda i:i[0]):
+		inst_names.append(inst_name)
+		masters.append(inst_master)
+		key = tuple(inst_attr.items())
+		attr_ids.append(attrs.setdefault(key, (len(attrs), inst_attr))[0])
+		nets.extend([net_ids.setdefault(net, len(net_ids)) for net in inst_nets])
+		net_nums.append(len(inst_nets))
+	return name, ports, attr, tuple(net_ids), inst_names, masters, attr_ids, nets, net_nums
+
+# ---------------------------------------------------------------------
+# build subckts from packed chunk subckts
+# ---------------------------------------------------------------------
+def build_chunk_subckts(chunk_subckts, chunk_attrs, subckts, attrs):
+	chunk_attrs = [get_shared_attr(attr, attrs) for _, attr in chunk_attrs]
+	new_inst = core.inst.__new__
+	for name, ports, attr, net_names, inst_names, masters, attr_ids, nets, net_nums in chunk_subckts:
+		subckt = core.subckt(name, None, [], attr)
+		subckt._net_ids = dict(zip(net_names, range(len(net_names))))
+		subckt.ports = ports
+		insts, pos = [], 0
+		for inst_name, master, attr_id, net_num in zip(inst_names, masters, attr_ids, net_nums):
+			inst = new_inst(core.inst)
+			inst.name = inst_name
+			inst._subckt = subckt
+			inst.net_ids = nets[pos:pos + net_num]
+			inst._master = master
+			inst._attr = chunk_attrs[attr_id]
+			inst._is_pri = False
+			insts.append(inst)
+			pos += net_num
+		subckt._insts = core.name_list(insts, subckt)
+		subckts[name] = subckt
+
+# ---------------------------------------------------------------------
+# parse netlist in parallel
+# ---------------------------------------------------------------------
+def parse_parallel_netlist(file_path, workers, rowcmt = '*', inline = '$'):
+	size = os.path.getsize(file_path)
+	chunk_num = workers * 4
+	bounds = [size * i // chunk_num for i in range(chunk_num)] + [None]
+	subckts, top_events, attrs = {}, [], {}
+	with no_gc():
+		with cf.ProcessPoolExecutor(max_workers = workers) as pool:
+			jobs = [pool.submit(parse_netlist_chunk, file_path, bounds[i], bounds[i + 1], rowcmt, inline)
+					for i in range(chunk_num)]
+			for job in jobs:
+				chunk_subckts, chunk_attrs, chunk_top_events = job.result()
+				build_chunk_subckts(chunk_subckts, chunk_attrs, subckts, attrs)
+				top_events += chunk_top_events
+		netlist = parse_netlist_events(top_events, file_path, subckts, rowcmt, inline)
 	return netlist
 
+# ---------------------------------------------------------------------
+# pause garbage collection
+# ---------------------------------------------------------------------
+@contextlib.contextmanager
+def no_gc():
+	gc_enabled = gc.isenabled()
+	gc.disable()
+	try:
+		yield
+	finally:
+		if gc_enabled:
+			gc.enable()
+
+# ---------------------------------------------------------------------
+# walk hierarchy
+# ---------------------------------------------------------------------
+def walk(state, expand):
+	stack = [expand(state)]
+	while stack:
+		for is_result, item in stack[-1]:
+			if is_result:
+				yield item
+			else:
+				stack.append(expand(item))
+				break
+		else:
+			stack.pop()
+
+# ---------------------------------------------------------------------
+# get path from chain of (instance, lower chain)
+# ---------------------------------------------------------------------
+def get_chain_path(chain):
+	path = []
+	while chain != None:
+		inst, chain = chain
+		path.append(inst)
+	return tuple(path)
+
 # ---------------------------------------------------------------------
 # get subckt dictionary
 # ---------------------------------------------------------------------
@@ -18,8 +18,42 @@
 # Date			: 2025/08/01
 # Description	: Read spice netlist into Python object (global variable only)
 # =====================================================================
+import os
+
 linear_element = {'r': 'resistor',
 				  'c': 'capacitor',
 				  'l': 'inductor',
 				  'v': 'voltage',
 				  'i': 'current'}
+
+directive = {'.subckt': 'subckt',
+			 '.ends': 'ends',
+			 '.global': 'global',
+			 '.include': 'include',
+			 '.inc': 'include',
+			 '.lib': 'lib',
+			 '.endl': 'endl'}
+
+unit_scale = {'t': 1e12,
+			  'g': 1e9,
+			  'meg': 1e6,
+			  'k': 1e3,
+			  'mil': 25.4e-6,
+			  'm': 1e-3,
+			  'u': 1e-6,
+			  'n': 1e-9,
+			  'p': 1e-12,
+			  'f': 1e-15,
+			  'a': 1e-18}
+
+lib_cache = {}
+
+ignore_case = False
+
+codec_magic = {b'\x1f\x8b': 'gzip',
+			   b'BZh': 'bz2',
+			   b'\xfd7zXZ\x00': 'xz',
+			   b'\x28\xb5\x2f\xfd': 'zstd'}
+
+cache_dir = os.environ.get('RDNL_CACHE_DIR', os.path.expanduser('~/.cache/rdnl'))
+cache_size = 1024 ** 3
@@ -0,0 +1,725 @@
+#!/usr/bin/python3
+
+# CONFIDENTIAL AND PROPRIETARY CODE
+# =====================================================================
+# Copyright (c) 2025 [Yuan Ming Yu]. All rights reserved.
+# This code is confidential and proprietary to [Yuan Ming Yu].
+#
+# Unauthorized copying, modification, distribution, or disclosure of this
+# code is strictly prohibited.
+#
+# This code is provided "as-is" without any warranty, express or implied.
+# Use at your own risk.
+#
+# For any inquiries regarding usage or licensing, please contact:
+# [Contact Information or Legal Team Email]
+# =====================================================================
+# Author		: Yuan Ming Yu
+# Date			: 2025/08/01
+# Description	: Read spice netlist into Python object (benchmark)
+# Usage			: python3 bench_rdnl.py [bench ...]
+# =====================================================================
+import sys, os, re, bz2, gzip, lzma, copy, time, pickle, resource, tracemalloc, multiprocessing as mp
+sys.path.append('../..')
+import rdnl
+import rdnl.func as func
+
+bench_dir = '/tmp/rdnl_bench'
+
+# ---------------------------------------------------------------------
+# generate netlist
+# ---------------------------------------------------------------------
+def gen_netlist(file_path, cell_num = 200, inst_num = 200000):
+	'''
+	Description:
+		Generate synthetic post-layout style netlist
+	Args:
+		Netlist file path
+		Number of leaf cells
+		Number of leaf cell instances under top-level block
+	Return:
+		Netlist file path
+	'''
+	if os.path.exists(file_path):
+		return file_path
+	os.makedirs(os.path.dirname(file_path), exist_ok = True)
+	with open(file_path, 'w') as f:
+		f.write('* synthetic netlist\n.global VDD VSS\n\n')
+		for c in range(cell_num):
+			f.write(f'.SUBCKT CELL{c} A B Y\n')
+			f.write('* extracted devices\n')
+			f.write(f'M1 N1 A VSS VSS NMOS W=1u L=0.18u $ pull-down\n')
+			f.write(f'M2 Y B N1 VSS NMOS\n+ W=1u L=0.18u\n')
+			f.write(f'M3 Y A VDD VDD PMOS W=2u L=0.18u\n')
+			f.write(f'M4 Y B VDD VDD PMOS W=2u L=0.18u\n')
+			f.write(f'r1 Y N1 1k\nc1 Y VSS 1f\n')
+			f.write(f'.ENDS CELL{c}\n\n')
+		f.write('.SUBCKT BLOCK IN OUT\n')
+		for i in range(inst_num):
+			c = i % cell_num
+			f.write(f'X{i} n{i} IN n{i + 1} CELL{c}\n')
+		f.write(f'r0 n{inst_num} OUT 1\n')
+		f.write('.ENDS BLOCK\n\n')
+		f.write('xblock in out BLOCK\n')
+	return file_path
+
+# ---------------------------------------------------------------------
+# run function in isolated process
+# ---------------------------------------------------------------------
+def run_isolated(fn, *args, **kwargs):
+	'''
+	Description:
+		Run function in forked process to measure wall time and peak RSS
+	Args:
+		Function
+		Function arguments
+		Function keyword arguments
+	Return:
+		Run time (s), peak RSS (MB)
+	'''
+	def child(conn):
+		time_start = time.time()
+		fn(*args, **kwargs)
+		time_run = time.time() - time_start
+		peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+		conn.send((time_run, peak_rss))
+		conn.close()
+	ctx = mp.get_context('fork')
+	parent_conn, child_conn = ctx.Pipe()
+	proc = ctx.Process(target = child, args = (child_conn,))
+	proc.start()
+	result = parent_conn.recv()
+	proc.join()
+	return result
+
+# ---------------------------------------------------------------------
+# print result
+# ---------------------------------------------------------------------
+def print_result(name, time_run, peak_rss = None, base = None):
+	line = f'{name:<40}{time_run:>10.3f}s'
+	if peak_rss is not None:
+		line += f'{peak_rss:>10.1f}MB'
+	if base:
+		line += f'{base / time_run:>8.2f}x'
+	print(line)
+
+# ---------------------------------------------------------------------
+# benchmark: read netlist
+# ---------------------------------------------------------------------
+def read_netlist_tmp(file_path, rowcmt = '*', inline = '$'):
+	tmp_file_path = '/tmp/' + os.path.basename(file_path) + '.tmp'
+	func.proc_netlist(file_path, tmp_file_path, rowcmt, inline)
+	os.system(f'sed -i \'1d\' {tmp_file_path}')
+	with open(tmp_file_path, 'r') as f:
+		lines = (line.strip('\n') for line in f)
+		return func.parse_netlist(lines, file_path)
+
+def bench_read_netlist():
+	file_path = gen_netlist(f'{bench_dir}/block.sp')
+	size = round(os.path.getsize(file_path) / (1024 ** 2), 1)
+	print(f'netlist: {file_path} ({size}MB)')
+	time_tmp, rss_tmp = run_isolated(read_netlist_tmp, file_path)
+	time_new, rss_new = run_isolated(rdnl.api.read_netlist, file_path, '*', '$', False)
+	print_result('/tmp file + sed + parse', time_tmp, rss_tmp)
+	print_result('single-pass stream parse', time_new, rss_new, time_tmp)
+
+# ---------------------------------------------------------------------
+# benchmark: parsed netlist cache
+# ---------------------------------------------------------------------
+def bench_cache():
+	file_path = gen_netlist(f'{bench_dir}/block.sp')
+	rdnl.globalvar.cache_dir = f'{bench_dir}/cache'
+	rdnl.api.clear_cache()
+	time_parse, rss_parse = run_isolated(rdnl.api.read_netlist, file_path, '*', '$', False)
+	run_isolated(rdnl.api.read_netlist, file_path)
+	time_hit, rss_hit = run_isolated(rdnl.api.read_netlist, file_path)
+	print_result('parse (cache off)', time_parse, rss_parse)
+	print_result('load (cache hit)', time_hit, rss_hit, time_parse)
+	rdnl.api.clear_cache()
+
+# ---------------------------------------------------------------------
+# benchmark: lazy subckt loading
+# ---------------------------------------------------------------------
+def read_query(file_path, lazy, names):
+	netlist = rdnl.api.read_netlist(file_path, use_cache = False, lazy = lazy)
+	for name in names:
+		netlist.get_subckt(name).insts
+
+def bench_lazy():
+	file_path = gen_netlist(f'{bench_dir}/cells.sp', 50000, 1000)
+	names = ['BLOCK', 'CELL7', 'CELL4242']
+	time_eager, rss_eager = run_isolated(read_query, file_path, False, names)
+	time_lazy, rss_lazy = run_isolated(read_query, file_path, True, names)
+	print_result('eager parse + query', time_eager, rss_eager)
+	print_result('lazy index + query', time_lazy, rss_lazy, time_eager)
+
+# ---------------------------------------------------------------------
+# benchmark: parallel parsing
+# ---------------------------------------------------------------------
+def bench_parallel():
+	file_path = gen_netlist(f'{bench_dir}/block.sp')
+	cpu_num = os.cpu_count()
+	print(f'cpu count: {cpu_num}')
+	time_serial, rss_serial = run_isolated(rdnl.api.read_netlist, file_path, '*', '$', False)
+	print_result('serial parse', time_serial, rss_serial)
+	workers = 2
+	while workers <= max(cpu_num, 2):
+		time_par, rss_par = run_isolated(rdnl.api.read_netlist, file_path, '*', '$', False, False, workers)
+		print_result(f'parallel parse ({workers} workers)', time_par, rss_par, time_serial)
+		workers *= 2
+	time_parent = link_chunks(file_path, 8)
+	print_result('parent linking only (speedup ceiling)', time_parent, None, time_serial)
+
+def link_chunks(file_path, chunk_num):
+	size = os.path.getsize(file_path)
+	bounds = [size * i // chunk_num for i in range(chunk_num)] + [None]
+	chunks = [pickle.dumps(func.parse_netlist_chunk(file_path, bounds[i], bounds[i + 1]), pickle.HIGHEST_PROTOCOL)
+			  for i in range(chunk_num)]
+	time_start = time.time()
+	subckts, top_events, attrs = {}, [], {}
+	with func.no_gc():
+		for chunk in chunks:
+			chunk_subckts, chunk_attrs, chunk_top_events = pickle.loads(chunk)
+			func.build_chunk_subckts(chunk_subckts, chunk_attrs, subckts, attrs)
+			top_events += chunk_top_events
+		func.parse_netlist_events(top_events, file_path, subckts)
+	return time.time() - time_start
+
+# ---------------------------------------------------------------------
+# benchmark: line classification
+# ---------------------------------------------------------------------
+def rd_inst_line_regex(words):
+	name, nets, master, attr = words[0], [], None, {}
+	l = len(words)
+	for i in range(1, l):
+		word = words[i]
+		if not master and (i < l - 1 and '=' in words[i + 1] or i == l - 1):
+			master = word
+		elif '=' in word:
+			var, val = word.split('=')
+			attr[var] = val
+		else:
+			nets.append(word)
+	return name, nets, master, attr
+
+def classify_regex(lines, subckt_name):
+	for line in lines:
+		words = line.split()
+		if re.search(r'^\.subckt\s+\w+', line, re.IGNORECASE):
+			pass
+		elif re.search(r'^\.ends\s+' + subckt_name, line, re.IGNORECASE):
+			pass
+		elif re.search(r'^\.global\s+' + subckt_name, line, re.IGNORECASE):
+			pass
+		else:
+			rd_inst_line_regex(words)
+
+def classify_dispatch(lines):
+	for kind, words in func.rd_line_words(lines):
+		if kind == 'inst':
+			func.rd_inst_line(words)
+
+def bench_classify(line_num = 2000000):
+	lines = [f'M{i} n{i} a{i % 7} VSS VSS NMOS W=1u L=0.18u' for i in range(line_num)]
+	time_start = time.time()
+	classify_regex(lines, 'CELL0')
+	time_regex = time.time() - time_start
+	time_start = time.time()
+	classify_dispatch(lines)
+	time_dispatch = time.time() - time_start
+	print(f'instance lines: {line_num}')
+	print_result('regex classify + look-ahead tokenize', time_regex)
+	print_result('dispatch classify + single split', time_dispatch, None, time_regex)
+	print(f'per line: {time_regex / line_num * 1e9:.0f}ns -> {time_dispatch / line_num * 1e9:.0f}ns')
+
+# ---------------------------------------------------------------------
+# benchmark: netlist events
+# ---------------------------------------------------------------------
+def count_masters(file_path):
+	masters = {}
+	for event in rdnl.api.iter_netlist(file_path):
+		if event[0] == 'inst':
+			masters[event[3]] = masters.get(event[3], 0) + 1
+	return masters
+
+def count_masters_netlist(file_path):
+	netlist = rdnl.api.read_netlist(file_path, use_cache = False)
+	masters = {}
+	for subckt in netlist.subckts:
+		for inst in subckt.insts:
+			masters[str(inst.master)] = masters.get(str(inst.master), 0) + 1
+	return masters
+
+def bench_events():
+	file_path = gen_netlist(f'{bench_dir}/block.sp')
+	time_netlist, rss_netlist = run_isolated(count_masters_netlist, file_path)
+	time_events, rss_events = run_isolated(count_masters, file_path)
+	print_result('count masters on netlist', time_netlist, rss_netlist)
+	print_result('count masters on events', time_events, rss_events, time_netlist)
+
+# ---------------------------------------------------------------------
+# benchmark: shared library
+# ---------------------------------------------------------------------
+def gen_decks(deck_num = 50, cell_num = 2000):
+	lib_path = gen_netlist(f'{bench_dir}/lib/cells.sp', cell_num, 0)
+	with open(lib_path, 'r') as f:
+		cells = f.read()
+	deck_paths = {'include': [], 'inline': []}
+	for d in range(deck_num):
+		body = f'.SUBCKT DECK{d} IN OUT\n'
+		body += ''.join([f'X{i} n{i} IN n{i + 1} CELL{(i * 7 + d) % cell_num}\n' for i in range(100)])
+		body += f'.ENDS DECK{d}\nxdeck in out DECK{d}\n'
+		for mode in deck_paths:
+			deck_path = f'{bench_dir}/lib/deck_{mode}_{d}.sp'
+			with open(deck_path, 'w') as f:
+				f.write(f".include '{lib_path}'\n" if mode == 'include' else cells)
+				f.write(body)
+			deck_paths[mode].append(deck_path)
+	return deck_paths
+
+def read_decks(deck_paths):
+	return [rdnl.api.read_netlist(deck_path, use_cache = False) for deck_path in deck_paths]
+
+def bench_lib():
+	deck_paths = gen_decks()
+	time_inline, rss_inline = run_isolated(read_decks, deck_paths['inline'])
+	time_include, rss_include = run_isolated(read_decks, deck_paths['include'])
+	print(f'decks: {len(deck_paths["include"])}')
+	print_result('library cells inlined per deck', time_inline, rss_inline)
+	print_result('shared .include library', time_include, rss_include, time_inline)
+
+# ---------------------------------------------------------------------
+# benchmark: batch read
+# ---------------------------------------------------------------------
+def bench_batch():
+	deck_paths = gen_decks()['inline'][:16]
+	cpu_num = os.cpu_count()
+	print(f'decks: {len(deck_paths)}, cpu count: {cpu_num}')
+	time_serial, rss_serial = run_isolated(rdnl.api.read_netlists, deck_paths, 1, use_cache = False)
+	print_result('serial read', time_serial, rss_serial)
+	workers = 2
+	while workers <= max(cpu_num, 2):
+		time_batch, rss_batch = run_isolated(rdnl.api.read_netlists, deck_paths, workers, use_cache = False)
+		print_result(f'batch read ({workers} workers)', time_batch, rss_batch, time_serial)
+		workers *= 2
+
+# ---------------------------------------------------------------------
+# benchmark: compressed netlist
+# ---------------------------------------------------------------------
+def compress_netlist(file_path, ext):
+	comp_path = f'{file_path}.{ext}'
+	if os.path.exists(comp_path):
+		return comp_path
+	with open(file_path, 'rb') as f:
+		data = f.read()
+	if ext == 'zst':
+		import zstandard
+		data = zstandard.ZstdCompressor().compress(data)
+	else:
+		data = {'gz': gzip, 'bz2': bz2, 'xz': lzma}[ext].compress(data)
+	with open(comp_path, 'wb') as f:
+		f.write(data)
+	return comp_path
+
+def bench_codec():
+	file_path = gen_netlist(f'{bench_dir}/block.sp')
+	size = os.path.getsize(file_path) / 1024**2
+	exts = ['gz', 'bz2', 'xz']
+	try:
+		import zstandard
+		exts.append('zst')
+	except ImportError:
+		pass
+	time_plain, rss_plain = run_isolated(rdnl.api.read_netlist, file_path, '*', '$', False)
+	print_result(f'plain ({size:.1f}MB, {size / time_plain:.1f}MB/s)', time_plain, rss_plain)
+	for ext in exts:
+		comp_path = compress_netlist(file_path, ext)
+		comp_size = os.path.getsize(comp_path) / 1024**2
+		time_comp, rss_comp = run_isolated(rdnl.api.read_netlist, comp_path, '*', '$', False)
+		print_result(f'{ext} ({comp_size:.1f}MB, {size / comp_size:.1f}x smaller, {size / time_comp:.1f}MB/s)',
+					 time_comp, rss_comp, time_plain)
+
+# ---------------------------------------------------------------------
+# benchmark: object model memory
+# ---------------------------------------------------------------------
+class inst_dict():
+	def __init__(self, name, nets, subckt, master, attr):
+		self.name = name
+		self.nets = nets
+		self.subckt = subckt
+		self.master = master
+		self.attr = attr
+		self.is_pri = False
+
+def read_dict_model(file_path):
+	insts, subckt_name = [], ''
+	with open(file_path, 'r') as f:
+		for kind, words in func.rd_line_words(func.rd_netlist_lines(f)):
+			if kind == 'inst':
+				name, nets, master, attr = rd_inst_line_regex(words)
+				insts.append(inst_dict(name, nets, subckt_name, master, attr))
+			elif kind == 'subckt':
+				subckt_name = words[1]
+	return insts, len(insts)
+
+def read_slot_model(file_path):
+	netlist = rdnl.api.read_netlist(file_path, use_cache = False)
+	return netlist, sum([len(subckt.insts) for subckt in netlist.subckts])
+
+def trace_isolated(fn, *args):
+	def child(conn):
+		tracemalloc.start()
+		obj, inst_num = fn(*args)
+		conn.send((tracemalloc.get_traced_memory()[0], inst_num))
+		conn.close()
+	ctx = mp.get_context('fork')
+	parent_conn, child_conn = ctx.Pipe()
+	proc = ctx.Process(target = child, args = (child_conn,))
+	proc.start()
+	result = parent_conn.recv()
+	proc.join()
+	return result
+
+def bench_memory():
+	for file_path in [gen_netlist(f'{bench_dir}/block.sp'), gen_netlist(f'{bench_dir}/cells.sp', 50000, 1000)]:
+		size_dict, inst_num = trace_isolated(read_dict_model, file_path)
+		size_slot, _ = trace_isolated(read_slot_model, file_path)
+		print(f'netlist: {file_path} ({inst_num} instances)')
+		print(f'{"__dict__ model (bytes/instance)":<40}{size_dict / inst_num:>10.1f}')
+		print(f'{"__slots__ + interned model":<40}{size_slot / inst_num:>10.1f}{size_dict / size_slot:>8.2f}x')
+
+# ---------------------------------------------------------------------
+# benchmark: net traversal and edit
+# ---------------------------------------------------------------------
+def bench_nets():
+	file_path = gen_netlist(f'{bench_dir}/block.sp')
+	netlist = rdnl.api.read_netlist(file_path, use_cache = False)
+	block = netlist.get_subckt('BLOCK')
+	net_path = netlist.get_path_from_str('xblock.IN')
+	for run in ['1st', '2nd']:
+		time_start = time.time()
+		pri_num = sum([1 for _ in netlist.get_net_to_pri_paths(net_path)])
+		print_result(f'net to primitive paths ({pri_num}, {run})', time.time() - time_start)
+	net_path = netlist.get_path_from_str('xblock.n100')
+	time_start = time.time()
+	pri_num = sum([1 for _ in netlist.get_net_to_pri_paths(net_path)])
+	print_result(f'net to primitive paths ({pri_num})', time.time() - time_start)
+	time_start = time.time()
+	net_num = sum([block.has_net(f'n{i * 997}') for i in range(200)])
+	print_result(f'has net ({net_num})', time.time() - time_start)
+	time_start = time.time()
+	for i in range(200):
+		block.replace_net('IN', f'n{i * 997}')
+	print_result('replace net (200)', time.time() - time_start)
+
+# ---------------------------------------------------------------------
+# benchmark: name lookup
+# ---------------------------------------------------------------------
+def bench_lookup(query_num = 200000):
+	file_path = gen_netlist(f'{bench_dir}/block.sp')
+	netlist = rdnl.api.read_netlist(file_path, use_cache = False)
+	block = netlist.get_subckt('BLOCK')
+	names = [f'X{i * 7919 % 200000}' for i in range(query_num)]
+	time_start = time.time()
+	found = sum([block.get_inst(name) != None for name in names])
+	print_result(f'get_inst ({found}/{query_num} found)', time.time() - time_start)
+	names = [f'CELL{i % 200}' for i in range(query_num)]
+	time_start = time.time()
+	found = sum([netlist.get_subckt(name) != None for name in names])
+	print_result(f'get_subckt ({found}/{query_num} found)', time.time() - time_start)
+
+# ---------------------------------------------------------------------
+# benchmark: hierarchy climbing
+# ---------------------------------------------------------------------
+def gen_bus_netlist(file_path, depth = 20, port_num = 4000):
+	if os.path.exists(file_path):
+		return file_path
+	os.makedirs(os.path.dirname(file_path), exist_ok = True)
+	ports = ' '.join([f'b{i}' for i in range(port_num)])
+	with open(file_path, 'w') as f:
+		for d in range(depth):
+			f.write(f'.SUBCKT L{d} {ports}\n')
+			if d < depth - 1:
+				f.write(f'x{d} {ports} L{d + 1}\n')
+			else:
+				f.write(''.join([f'r{i} b{i} 0 1\n' for i in range(port_num)]))
+			f.write(f'.ENDS L{d}\n\n')
+		f.write(f'xtop {ports} L0\n')
+	return file_path
+
+def bench_climb(path_num = 20000, depth = 20, port_num = 4000):
+	file_path = gen_bus_netlist(f'{bench_dir}/bus.sp', depth, port_num)
+	netlist = rdnl.api.read_netlist(file_path, use_cache = False)
+	inst_path = netlist.get_path_from_str('.'.join(['xtop'] + [f'x{d}' for d in range(depth - 1)] + ['b0']))[:-1]
+	net_paths = [inst_path + [f'b{i * 7 % port_num}'] for i in range(path_num)]
+	time_start = time.time()
+	top_net_paths = [netlist.get_top_path(net_path) for net_path in net_paths]
+	print(f'hierarchy depth: {depth}, ports: {port_num}')
+	print_result(f'get_top_path ({len(top_net_paths)} paths)', time.time() - time_start)
+
+# ---------------------------------------------------------------------
+# benchmark: electrical node index
+# ---------------------------------------------------------------------
+def bench_node(pair_num = 100000, depth = 20, port_num = 4000):
+	file_path = gen_bus_netlist(f'{bench_dir}/bus.sp', depth, port_num)
+	netlist = rdnl.api.read_netlist(file_path, use_cache = False)
+	inst_path = netlist.get_path_from_str('.'.join(['xtop'] + [f'x{d}' for d in range(depth - 1)] + ['b0']))[:-1]
+	pairs = []
+	for i in range(pair_num):
+		l = i % depth + 1
+		pairs.append((inst_path[:l] + [f'b{i % port_num}'], inst_path + [f'b{i * 7 % port_num}']))
+	time_start = time.time()
+	same_top = sum([netlist.is_same_net(*pair) for pair in pairs])
+	time_top = time.time() - time_start
+	time_start = time.time()
+	netlist.build_node_index()
+	time_build = time.time() - time_start
+	time_start = time.time()
+	same_node = sum([netlist.is_same_net(*pair) for pair in pairs])
+	time_node = time.time() - time_start
+	print(f'hierarchy depth: {depth}, ports: {port_num}')
+	print_result(f'is_same_net by top path ({same_top})', time_top)
+	print_result('build node index', time_build)
+	print_result(f'is_same_net by node index ({same_node})', time_node, None, time_top)
+	time_start = time.time()
+	same_node = sum([netlist.is_same_net(*pair) for pair in pairs])
+	print_result(f'is_same_net by node index (repeat)', time.time() - time_start, None, time_top)
+
+# ---------------------------------------------------------------------
+# benchmark: where-used index
+# ---------------------------------------------------------------------
+def bench_users():
+	file_path = gen_netlist(f'{bench_dir}/block.sp')
+	netlist = rdnl.api.read_netlist(file_path, use_cache = False)
+	for name in ['CELL7', 'NMOS']:
+		time_start = time.time()
+		path_num = sum([1 for _ in netlist.get_subckt_inst_paths(name)])
+		print_result(f'get_subckt_inst_paths {name} ({path_num})', time.time() - time_start)
+		if hasattr(netlist, 'get_subckt_inst_count'):
+			time_start = time.time()
+			path_num = netlist.get_subckt_inst_count(name)
+			print_result(f'get_subckt_inst_count {name} ({path_num})', time.time() - time_start)
+
+# ---------------------------------------------------------------------
+# benchmark: deep hierarchy traversal
+# ---------------------------------------------------------------------
+def gen_deep_netlist(file_path, depth = 25, dev_num = 20000):
+	if os.path.exists(file_path):
+		return file_path
+	os.makedirs(os.path.dirname(file_path), exist_ok = True)
+	with open(file_path, 'w') as f:
+		for d in range(depth):
+			f.write(f'.SUBCKT L{d} A B\n')
+			if d < depth - 1:
+				f.write(f'x{d} A B L{d + 1}\n')
+			else:
+				f.write(''.join([f'r{i} A B 1\n' for i in range(dev_num)]))
+			f.write(f'.ENDS L{d}\n\n')
+		f.write('xtop a b L0\n')
+	return file_path
+
+def walk_deep(file_path):
+	netlist = rdnl.api.read_netlist(file_path, use_cache = False)
+	results = []
+	for name, fn, args in [('get_net_to_pri_paths', netlist.get_net_to_pri_paths, (['a'],)),
+						   ('get_net_to_inst_paths', netlist.get_net_to_inst_paths, (['a'], ['resistor'])),
+						   ('get_hier_net_paths', netlist.get_hier_net_paths, (['a'],)),
+						   ('get_subckt_inst_paths', netlist.get_subckt_inst_paths, ('resistor',))]:
+		time_start = time.time()
+		try:
+			path_num = sum([1 for _ in fn(*args)])
+		except RecursionError:
+			path_num = 'RecursionError'
+		results.append((f'{name} ({path_num})', time.time() - time_start))
+	return results
+
+def bench_walk():
+	for depth, dev_num in [(25, 20000), (1500, 100)]:
+		file_path = gen_deep_netlist(f'{bench_dir}/deep_{depth}.sp', depth, dev_num)
+		print(f'hierarchy depth: {depth}, devices: {dev_num}')
+		for name, time_run in walk_deep(file_path):
+			print_result(name, time_run)
+
+# ---------------------------------------------------------------------
+# benchmark: net to device dump
+# ---------------------------------------------------------------------
+def bench_dump():
+	file_path = gen_netlist(f'{bench_dir}/block.sp')
+	netlist = rdnl.api.read_netlist(file_path, use_cache = False)
+	block_path = netlist.get_path_from_str('xblock.IN')[:-1]
+	block = block_path[0].master
+	for run in ['1st', '2nd']:
+		time_start = time.time()
+		pri_num = 0
+		for net in block.get_net_names():
+			for pri_path, terms in netlist.get_net_to_pri_paths(block_path + [net]):
+				pri_num += 1
+		print_result(f'dump {len(block.get_net_names())} nets ({pri_num} pins, {run})', time.time() - time_start)
+
+# ---------------------------------------------------------------------
+# benchmark: bulk net queries
+# ---------------------------------------------------------------------
+def bench_bulk():
+	file_path = gen_netlist(f'{bench_dir}/block.sp')
+	netlist = rdnl.api.read_netlist(file_path, use_cache = False)
+	block = netlist.get_path_from_str('xblock.IN')[0].master
+	str_paths = [f'xblock.{net}' for net in block.get_net_names()]
+	str_paths += [f'xblock.X{i}.A' for i in range(0, len(block.insts), 2)]
+	list(netlist.get_net_to_pri_paths(['in']))
+	for query in ['pri', 'inst']:
+		time_start = time.time()
+		for str_path in str_paths:
+			net_path = netlist.get_path_from_str(str_path)
+			if query == 'pri':
+				list(netlist.get_net_to_pri_paths(net_path))
+			else:
+				list(netlist.get_net_to_inst_paths(net_path, ['NMOS']))
+		print_result(f'{query} per net ({len(str_paths)} paths)', time.time() - time_start)
+		time_start = time.time()
+		if query == 'pri':
+			netlist.get_nets_to_pri_paths(str_paths)
+		else:
+			netlist.get_nets_to_inst_paths(str_paths, ['NMOS'])
+		print_result(f'{query} batch ({len(str_paths)} paths)', time.time() - time_start)
+
+# ---------------------------------------------------------------------
+# benchmark: short all resistors
+# ---------------------------------------------------------------------
+def bench_short(res_num = 200000):
+	file_path = f'{bench_dir}/extract.sp'
+	if not os.path.exists(file_path):
+		os.makedirs(bench_dir, exist_ok = True)
+		with open(file_path, 'w') as f:
+			f.write('.SUBCKT EXTRACT IN OUT\n')
+			for i in range(res_num):
+				f.write(f'r{i} n{i} n{i}_{i % 4} 1\n')
+				f.write(f'M{i} n{i}_{i % 4} n{i + 1} VSS VSS NMOS\n')
+			f.write('.ENDS EXTRACT\n\nxext in out EXTRACT\n')
+	netlist = rdnl.api.read_netlist(file_path, use_cache = False)
+	time_start = time.time()
+	merges = netlist.short_by_term('resistor', [0, 1])
+	print_result(f'short {res_num} resistors ({len((merges or {}).get("EXTRACT", {}))} merged)', time.time() - time_start)
+
+# ---------------------------------------------------------------------
+# benchmark: eco edits
+# ---------------------------------------------------------------------
+def bench_eco(edit_num = 5000):
+	file_path = gen_netlist(f'{bench_dir}/block.sp')
+	for mode in ['direct', 'session']:
+		netlist = rdnl.api.read_netlist(file_path, use_cache = False)
+		block = netlist.get_subckt('BLOCK')
+		removes = [block.insts[i * 37] for i in range(edit_num)]
+		time_start = time.time()
+		session = netlist.edit() if mode == 'session' else None
+		for i, inst in enumerate(removes):
+			new_inst = rdnl.core.inst(f'XECO{i}', list(inst.nets), block, inst.master, inst.attr)
+			if session != None:
+				session.remove_inst(inst)
+				session.add_inst(new_inst)
+				session.replace_net(block, f'eco{i}', f'n{i * 37}')
+			else:
+				block.insts.remove(inst)
+				block.insts.append(new_inst)
+				block.replace_net(f'eco{i}', f'n{i * 37}')
+		if session != None:
+			session.commit()
+		print_result(f'{mode} eco ({edit_num} removes/adds/replaces)', time.time() - time_start)
+
+# ---------------------------------------------------------------------
+# benchmark: what-if variants
+# ---------------------------------------------------------------------
+def bench_clone(variant_num = 2):
+	file_path = gen_netlist(f'{bench_dir}/block.sp')
+	netlist = rdnl.api.read_netlist(file_path, use_cache = False)
+	for mode in ['deepcopy', 'clone']:
+		tracemalloc.start()
+		time_start = time.time()
+		variants = []
+		for v in range(variant_num):
+			variants.append(copy.deepcopy(netlist) if mode == 'deepcopy' else netlist.clone())
+			variants[-1].short_by_term('resistor', [0, 1])
+		mem = tracemalloc.get_traced_memory()[0] / (1024 ** 2)
+		tracemalloc.stop()
+		del variants
+		print_result(f'{mode} + short resistor ({variant_num} variants, {mem:.0f}MB)', time.time() - time_start)
+
+# ---------------------------------------------------------------------
+# benchmark: flatten
+# ---------------------------------------------------------------------
+def write_flat_tmp(netlist, flat):
+	with open(f'{bench_dir}/flat.sp', 'w') as f:
+		if flat:
+			netlist.flatten().write(f)
+		else:
+			netlist.write_flat(f)
+
+def bench_flatten():
+	file_path = gen_netlist(f'{bench_dir}/block.sp')
+	netlist = rdnl.api.read_netlist(file_path, use_cache = False)
+	time_start = time.time()
+	pri_num = sum([1 for _ in netlist.iter_flat()])
+	print_result(f'iter_flat ({pri_num} primitives)', time.time() - time_start)
+	time_flat, rss_flat = run_isolated(write_flat_tmp, netlist, True)
+	time_stream, rss_stream = run_isolated(write_flat_tmp, netlist, False)
+	print_result('flatten + write', time_flat, rss_flat)
+	print_result('write_flat (streaming)', time_stream, rss_stream)
+
+# ---------------------------------------------------------------------
+# benchmark: primitive table export
+# ---------------------------------------------------------------------
+def bench_table():
+	import numpy as np
+	file_path = gen_netlist(f'{bench_dir}/block.sp')
+	netlist = rdnl.api.read_netlist(file_path, use_cache = False)
+	time_start = time.time()
+	rows = [(name, nets, str(master), attr) for name, nets, master, attr in netlist.iter_flat()]
+	print_result(f'iter_flat into lists ({len(rows)} primitives)', time.time() - time_start)
+	time_start = time.time()
+	found = [name for name, nets, master, attr in rows
+			 if master == 'PMOS' and func.get_spice_value(attr.get('W')) > 1e-6 and 'VDD' in nets]
+	print_result(f'list query PMOS W>1u on VDD ({len(found)})', time.time() - time_start)
+	del rows
+	time_start = time.time()
+	table = netlist.get_pri_table()
+	print_result(f'get_pri_table ({len(table.master)} primitives)', time.time() - time_start)
+	time_start = time.time()
+	node = table.get_node('VDD')
+	mask = (table.master == table.get_master_code('PMOS')) & (table.w > 1e-6) & (table.nodes == node).any(axis = 1)
+	print_result(f'array query PMOS W>1u on VDD ({int(mask.sum())})', time.time() - time_start)
+
+# ---------------------------------------------------------------------
+# main function
+# ---------------------------------------------------------------------
+benches = {
+	'read_netlist': bench_read_netlist,
+	'cache': bench_cache,
+	'lazy': bench_lazy,
+	'parallel': bench_parallel,
+	'classify': bench_classify,
+	'events': bench_events,
+	'lib': bench_lib,
+	'batch': bench_batch,
+	'codec': bench_codec,
+	'memory': bench_memory,
+	'nets': bench_nets,
+	'lookup': bench_lookup,
+	'climb': bench_climb,
+	'node': bench_node,
+	'users': bench_users,
+	'walk': bench_walk,
+	'dump': bench_dump,
+	'bulk': bench_bulk,
+	'short': bench_short,
+	'eco': bench_eco,
+	'clone': bench_clone,
+	'flatten': bench_flatten,
+	'table': bench_table,
+}
+
+if __name__ == '__main__':
+	names = sys.argv[1:] if len(sys.argv) > 1 else list(benches)
+	for name in names:
+		print('-' * 80)
+		print(f'Benchmark: {name}')
+		print('-' * 80)
+		benches[name]()
@@ -18,13 +18,14 @@
 # Date			: 2025/08/01
 # Description	: Read spice netlist into Python object (testing)
 # =====================================================================
-import sys, os, time, copy, tracemalloc, subprocess as sp
+import sys, os, time, copy, bz2, gzip, lzma, tempfile, warnings, tracemalloc, subprocess as sp
 sys.path.append('../..')
 import rdnl
 
 time_start = time.time()
 tracemalloc.start()
 netlist_path = '../netlist/alu4_logic_netlist.sp'
+rdnl.globalvar.cache_dir = tempfile.mkdtemp()
 netlist = rdnl.api.read_netlist(netlist_path)
 os.system('rm -rf out')
 os.makedirs('out')
@@ -182,6 +183,16 @@ def test_netlist_get_subckt_inst_paths():
 	assert not diff_inv
 	assert not diff_pri
 
+def test_netlist_get_subckt_inst_count():
+	counts = [netlist.get_subckt_inst_count(i) for i in [subckt_name, subckt_name_inv, pri_name]]
+	paths = [list(netlist.get_subckt_inst_paths(i)) for i in [subckt_name, subckt_name_inv, pri_name]]
+	users = netlist.get_users(subckt_name)
+	all_counts = netlist._get_inst_counts()
+	assert counts == [len(i) for i in paths]
+	assert users and all([str(inst.master) == subckt_name for inst in users])
+	assert all([all_counts.get(i.name, 0) == netlist.get_subckt_inst_count(i.name) for i in netlist.subckts])
+	assert all_counts[pri_name] == counts[2]
+
 def test_netlist_is_same_net():
 	assert netlist.is_same_net(up_net_path, net_path)
 	assert not netlist.is_same_net(net_path_inv, net_path)
@@ -220,6 +231,136 @@ def test_netlist_short_by_term():
 	diff = sp.getoutput(f'diff out/{file_name} ref/{file_name}')
 	assert not diff
 
+def test_subckt_merge_nets():
+	merge_netlist = rdnl.api.read_netlist(netlist_path, use_cache = False)
+	merge_subckt = merge_netlist.get_subckt(short_subckt_name)
+	pin_num = len(merge_subckt.get_pins('A1')) + len(merge_subckt.get_pins('B1'))
+	merges = merge_subckt.merge_nets([['A0', 'B0'], ['B0', 'VDD'], ['A1', 'B1'], ['C0', 'C0']])
+	assert merges == {'A0': 'VDD', 'B0': 'VDD', 'A1': 'B1'}
+	assert not merge_subckt.has_net('A0') and not merge_subckt.has_net('A1')
+	assert len(merge_subckt.get_pins('B1')) == pin_num
+	merges = merge_netlist.short_by_term(subckt_name, [0, 1, 2])
+	assert merges[short_subckt_name] == {'XOR0': 'VDD', 'B1': 'XOR1', 'A2': 'XOR2', 'B2': 'XOR2', 'A3': 'XOR3', 'B3': 'XOR3'}
+
+def test_netlist_edit():
+	edit_netlist = rdnl.api.read_netlist(netlist_path, use_cache = False)
+	edit_subckt = edit_netlist.get_subckt(short_subckt_name)
+	inst_num = len(edit_subckt.insts)
+	try:
+		with edit_netlist.edit() as session:
+			session.remove_inst(edit_subckt.insts[0])
+			raise ValueError
+	except ValueError:
+		pass
+	assert len(edit_subckt.insts) == inst_num
+	with edit_netlist.edit() as session:
+		old_inst = edit_subckt.insts[0]
+		new_inst = rdnl.core.inst('M0', ['A0', 'B0', 'VSS', 'VSS'], edit_subckt, 'NMOS', {})
+		session.remove_inst(old_inst)
+		session.add_inst(new_inst)
+		session.replace_net(edit_subckt, short_master_net, short_slave_net)
+		assert edit_subckt.get_inst('M0') == None and edit_subckt.has_net(short_slave_net)
+	assert edit_subckt.get_inst('M0') == new_inst and edit_subckt.get_inst(old_inst.name) == None
+	assert list(new_inst.nets) == [short_master_net, 'B0', 'VSS', 'VSS']
+	assert not edit_subckt.has_net(short_slave_net) and len(edit_subckt.insts) == inst_num
+	merges = edit_netlist.edit().commit()
+	assert merges == {}
+	late_inst = rdnl.core.inst('M1', [short_master_net, 'late_net', 'VSS', 'VSS'], short_subckt_name, 'NMOS', {})
+	late_inst.is_pri = True
+	with edit_netlist.edit() as session:
+		session.add_inst(late_inst)
+		session.replace_net(edit_subckt, 'B0', 'late_net')
+		assert edit_subckt.get_net_id('late_net') == None
+	assert edit_subckt.get_inst('M1') == late_inst and list(late_inst.nets) == [short_master_net, 'B0', 'VSS', 'VSS']
+	assert not edit_subckt.has_net('late_net')
+	order_netlists = [rdnl.api.read_netlist(netlist_path, use_cache = False) for i in range(2)]
+	order_subckts = [order_netlist.get_subckt('ALU4') for order_netlist in order_netlists]
+	session = order_netlists[0].edit()
+	session.replace_net(order_subckts[0], 'A1', 'A0')
+	session.replace_net(order_subckts[0], 'A0', 'B0')
+	merges = session.commit()
+	order_subckts[1].replace_net('A1', 'A0')
+	order_subckts[1].replace_net('A0', 'B0')
+	assert merges == {'ALU4': {'A0': 'A1', 'B0': 'A0'}}
+	assert [list(inst.nets) for inst in order_subckts[0].insts] == [list(inst.nets) for inst in order_subckts[1].insts]
+	assert order_subckts[0].has_net('A0') and order_subckts[0].has_net('A1') and not order_subckts[0].has_net('B0')
+
+def test_netlist_clone():
+	clone_netlist = rdnl.api.read_netlist(netlist_path, use_cache = False)
+	with open('out/clone_orig', 'w') as f:
+		clone_netlist.write(f)
+	mux2 = clone_netlist.get_subckt('MUX2')
+	clone = clone_netlist.clone()
+	clone.short_by_term('resistor', [0, 1])
+	clone.short_by_term(subckt_name, [0, 1, 2])
+	file_name = subckt_name + '_res_short_by_term'
+	with open(f'out/clone_{file_name}', 'w') as f:
+		clone.write(f)
+	with open('out/clone_orig_after', 'w') as f:
+		clone_netlist.write(f)
+	diff = sp.getoutput(f'diff out/clone_{file_name} ref/{file_name}')
+	diff_orig = sp.getoutput('diff out/clone_orig out/clone_orig_after')
+	assert not diff and not diff_orig
+	assert clone.subckts.get('NOT') is clone_netlist.subckts.get('NOT')
+	assert clone.subckts.get(short_subckt_name) is not clone_netlist.subckts.get(short_subckt_name)
+	assert clone.top_subckt.get_inst(inst_name).master is clone.subckts.get(short_subckt_name)
+	edit_serials = (clone._serial, clone_netlist._serial)
+	assert clone.get_subckt('NAND2') is clone_netlist.get_subckt('NAND2')
+	assert (clone._serial, clone_netlist._serial) == edit_serials
+	owned = clone.own_subckt('NOT')
+	owned.insts[0].set_attr('W', '9u')
+	clone.own_subckt(short_subckt_name).replace_net(short_master_net, short_slave_net)
+	with open('out/clone_orig_after', 'w') as f:
+		clone_netlist.write(f)
+	diff_orig = sp.getoutput('diff out/clone_orig out/clone_orig_after')
+	assert not diff_orig
+	assert owned is clone.get_subckt('NOT') and clone_netlist.get_subckt('NOT').insts[0].attr.get('W') != '9u'
+	assert clone.get_subckt(short_subckt_name).get_net_id(short_slave_net) != None
+	assert not clone.get_subckt(short_subckt_name).has_net(short_slave_net)
+	assert clone_netlist.get_subckt(short_subckt_name).has_net(short_slave_net)
+	nand2 = clone_netlist.get_subckt('NAND2')
+	nand2.insts[0].set_attr('W', '9u')
+	mux2.replace_net('A', 'B')
+	assert clone_netlist.get_subckt('NAND2') is nand2 and clone_netlist.get_subckt('MUX2') is mux2
+	assert nand2.insts[0].attr['W'] == '9u' and not mux2.has_net('B')
+	assert clone.get_subckt('NAND2').insts[0].attr['W'] == '1u' and clone.get_subckt('MUX2').has_net('B')
+	with clone.edit() as session:
+		session.remove_inst(clone.get_subckt('AND2').insts[1])
+	assert len(clone.get_subckt('AND2').insts) == len(clone_netlist.get_subckt('AND2').insts) - 1
+
+def test_netlist_flatten():
+	flat_netlist = rdnl.api.read_netlist(netlist_path, use_cache = False)
+	file_name = 'alu4_flatten'
+	with open(f'out/{file_name}', 'w') as f:
+		pri_num = flat_netlist.write_flat(f)
+	with open(f'out/{file_name}_netlist', 'w') as f:
+		flat_netlist.flatten().write(f)
+	diff = sp.getoutput(f'diff out/{file_name} ref/{file_name}')
+	diff_netlist = sp.getoutput(f'diff out/{file_name}_netlist ref/{file_name}')
+	assert not diff and not diff_netlist
+	flat = flat_netlist.flatten()
+	pri_path = flat_netlist.get_path_from_str(str_pri_path)
+	nets = []
+	for term in range(len(pri_path[-1].nets)):
+		top_path = flat_netlist.get_top_path(flat_netlist.get_net_path_at_term(pri_path, term))
+		nets.append(top_path[-1] if top_path[-1] in flat.globals else flat.get_str_path(top_path))
+	assert list(flat.top_subckt.get_inst(str_pri_path).nets) == nets
+	assert pri_num == len(flat.top_subckt.insts) == len(flat_netlist.top_subckt.insts) - 1 + 2 * flat_netlist.get_subckt_inst_count(pri_name)
+
+def test_netlist_get_pri_table():
+	table_netlist = rdnl.api.read_netlist(netlist_path, use_cache = False)
+	table = table_netlist.get_pri_table()
+	flat = sorted([(name, nets, str(master)) for name, nets, master, attr in table_netlist.iter_flat()])
+	rows = sorted([(table.get_name(i), [table.get_node_name(node) for node in table.nodes[i] if node >= 0],
+					table.masters[table.master[i]]) for i in range(len(table.master))])
+	assert rows == flat
+	node = table.get_node('a0')
+	mask = (table.master == table.get_master_code(pri_name)) & (table.w > 0.5e-6) & (table.nodes == node).any(axis = 1)
+	names = sorted([name for name, nets, master in flat if master == pri_name and 'a0' in nets])
+	assert sorted([table.get_name(i) for i in mask.nonzero()[0]]) == names and names
+	assert table.get_node('dummy_net') == None and table.get_master_code('dummy_master') == -1
+	assert table.val[table.master == table.get_master_code('resistor')].tolist() == [1e3, 1e3]
+
 def test_netlist_get_net_to_inst_paths():
 	inst_paths = netlist.get_net_to_inst_paths(net_path, [subckt_name, pri_name])
 	file_name = str_net_path + '_get_net_to_inst_paths'
@@ -229,6 +370,18 @@ def test_netlist_get_net_to_inst_paths():
 	diff = sp.getoutput(f'diff out/{file_name} ref/{file_name}')
 	assert not diff
 
+def test_netlist_get_nets_to_paths():
+	net_paths = [str_net_path, str_up_path, str_top_path, str_net_path_inv, net_path]
+	pri_paths = netlist.get_nets_to_pri_paths(net_paths)
+	inst_paths = netlist.get_nets_to_inst_paths(net_paths, [subckt_name, pri_name])
+	assert list(pri_paths) == net_paths[:-1] + [tuple(net_path)]
+	assert pri_paths[str_net_path] == list(netlist.get_net_to_pri_paths(net_path))
+	assert pri_paths[str_net_path] == pri_paths[str_top_path] and pri_paths[str_net_path_inv] == []
+	pri_paths[str_net_path][0][1].append(-1)
+	pri_paths[str_net_path].pop()
+	assert pri_paths[str_top_path] == list(netlist.get_net_to_pri_paths(net_path))
+	assert inst_paths[tuple(net_path)] == list(netlist.get_net_to_inst_paths(net_path, [subckt_name, pri_name]))
+
 # ---------------------------------------------------------------------
 # Class: subckt
 # ---------------------------------------------------------------------
@@ -264,6 +417,320 @@ def test_subckt_show():
 	assert not diff_2
 	assert not diff_3
 
+# ---------------------------------------------------------------------
+# API
+# ---------------------------------------------------------------------
+def test_api_read_netlist_cache():
+	cache_dir = rdnl.globalvar.cache_dir
+	rdnl.globalvar.cache_dir = tempfile.mkdtemp()
+	rdnl.api.clear_cache()
+	netlist_miss = rdnl.api.read_netlist(netlist_path)
+	netlist_hit = rdnl.api.read_netlist(netlist_path)
+	netlist_off = rdnl.api.read_netlist(netlist_path, use_cache = False)
+	stats = rdnl.api.get_cache_stats()
+	rdnl.api.clear_cache()
+	rdnl.globalvar.cache_dir = '/proc/rdnl_cache'
+	netlist_ro = rdnl.api.read_netlist(netlist_path)
+	rdnl.globalvar.cache_dir = cache_dir
+	file_name = os.path.basename(netlist_path)
+	with open(f'out/cache_{file_name}', 'w') as f:
+		netlist_hit.write(f)
+	diff = sp.getoutput(f'diff out/cache_{file_name} ref/{file_name}')
+	os.remove(f'out/cache_{file_name}')
+	assert stats == {'hit': 1, 'miss': 1}
+	assert netlist_hit is not netlist_miss
+	assert netlist_ro.get_subckt(subckt_name).insts[0].master.name == 'NAND2'
+	assert netlist_hit.get_subckt(subckt_name).insts[0].master.name == 'NAND2'
+	assert not diff
+
+def test_api_read_netlist_lazy():
+	lazy_netlist = rdnl.api.read_netlist(netlist_path, lazy = True)
+	unloaded = [subckt.name for subckt in lazy_netlist.subckts if subckt.loader]
+	path = lazy_netlist.get_path_from_str(str_net_path)
+	loaded = [subckt.name for subckt in lazy_netlist.subckts if not subckt.loader]
+	file_name = os.path.basename(netlist_path)
+	with open(f'out/lazy_{file_name}', 'w') as f:
+		lazy_netlist.write(f)
+	diff = sp.getoutput(f'diff out/lazy_{file_name} ref/{file_name}')
+	os.remove(f'out/lazy_{file_name}')
+	assert len(unloaded) == len(netlist.subckts) - 1
+	assert lazy_netlist.get_str_path(path) == str_net_path
+	assert loaded == ['', 'ALU4', 'FULLADDER']
+	assert not diff
+
+def test_api_read_netlist_parallel():
+	par_netlist = rdnl.api.read_netlist(netlist_path, use_cache = False, workers = 3)
+	file_name = os.path.basename(netlist_path)
+	with open(f'out/parallel_{file_name}', 'w') as f:
+		par_netlist.write(f)
+	diff = sp.getoutput(f'diff out/parallel_{file_name} ref/{file_name}')
+	os.remove(f'out/parallel_{file_name}')
+	assert par_netlist.get_subckt(subckt_name).insts[0].master.name == 'NAND2'
+	assert not diff
+
+def test_api_iter_netlist():
+	events = list(rdnl.api.iter_netlist(netlist_path))
+	kinds = [event[0] for event in events]
+	masters = {}
+	for event in events:
+		if event[0] == 'inst':
+			masters[event[3]] = masters.get(event[3], 0) + 1
+	assert kinds.count('subckt') == kinds.count('ends') == len(netlist.subckts) - 1
+	assert ('global', ['VSS']) in events
+	assert ('inst', 'ra0', ['a0', 'VSS'], 'resistor', {'val': '1k'}) in events
+	assert masters['NMOS'] == masters['PMOS'] == 7
+	assert ('include', 'std_cell_lib.sp', 'TT') in rdnl.api.iter_netlist('../netlist/buf_chain.sp')
+	lib_kinds = [event[0] for event in rdnl.api.iter_netlist('../netlist/std_cell_lib.sp')]
+	assert lib_kinds.count('lib') == lib_kinds.count('endl') == 2
+
+def test_api_read_netlist_lib():
+	lib_netlist_path = '../netlist/buf_chain.sp'
+	lib_path = os.path.realpath('../netlist/std_cell_lib.sp')
+	cache_dir = rdnl.globalvar.cache_dir
+	rdnl.globalvar.cache_dir = tempfile.mkdtemp()
+	rdnl.api.clear_cache()
+	netlist_1 = rdnl.api.read_netlist(lib_netlist_path)
+	netlist_2 = rdnl.api.read_netlist(lib_netlist_path)
+	stats = rdnl.api.get_cache_stats()
+	rdnl.api.clear_cache()
+	rdnl.globalvar.cache_dir = cache_dir
+	inv = netlist_1.get_subckt('INV')
+	pri_path = netlist_1.get_path_from_str('xchain.X1.X2.M2')
+	netlist_2.subckts.append(rdnl.core.subckt('NEWCELL', ['A', 'Y'], [], {}))
+	with open('out/buf_chain.sp', 'w') as f:
+		netlist_2.write(f)
+	with open('out/buf_chain.sp', 'r') as f:
+		lines = f.read().splitlines()
+	os.remove('out/buf_chain.sp')
+	assert stats == {'hit': 1, 'miss': 1}
+	assert netlist_1.includes == [(lib_path, 'TT')]
+	assert inv is netlist_2.get_subckt('INV')
+	assert inv.netlist.lib[:2] == (lib_path, 'tt')
+	assert inv.insts[0].attr['W'] == '1u'
+	assert netlist_1.get_str_path(pri_path) == 'xchain.X1.X2.M2'
+	assert f".lib '{lib_path}' TT" in lines
+	assert '.subckt CHAIN IN OUT' in lines
+	assert '.subckt NEWCELL A Y' in lines
+	assert '.subckt INV A Y' not in lines
+
+def test_api_read_netlist_lib_edit():
+	lib_netlist_path = '../netlist/buf_chain.sp'
+	netlist_a = rdnl.api.read_netlist(lib_netlist_path, use_cache = False)
+	netlist_b = rdnl.api.read_netlist(lib_netlist_path, use_cache = False)
+	lib_inv = netlist_b.get_subckt('INV')
+	merges = netlist_a.short_by_term('PMOS', [0, 1])
+	netlist_c = rdnl.api.read_netlist(lib_netlist_path, use_cache = False)
+	try:
+		lib_inv.replace_net('A', 'Y')
+		error = None
+	except RuntimeError as e:
+		error = e
+	with open('out/buf_chain_edit.sp', 'w') as f:
+		netlist_a.write(f)
+	with open('out/buf_chain_edit.sp', 'r') as f:
+		lines = f.read().splitlines()
+	netlist_d = rdnl.api.read_netlist('out/buf_chain_edit.sp', use_cache = False)
+	os.remove('out/buf_chain_edit.sp')
+	names = [line.split()[1].lower() for line in lines if line.lower().startswith('.subckt')]
+	names += [subckt.name.lower() for subckt in lib_inv.netlist.subckts if subckt.name]
+	assert merges == {'INV': {'A': 'Y'}}
+	assert len(netlist_a.get_subckt('INV').insts) == 1
+	assert netlist_a.get_subckt('INV').netlist is netlist_a
+	assert netlist_a.get_subckt('BUF').insts[0].master is netlist_a.get_subckt('INV')
+	assert len(lib_inv.insts) == len(netlist_c.get_subckt('INV').insts) == 2
+	assert netlist_c.get_subckt('INV') is lib_inv
+	assert error != None
+	assert len(names) == len(set(names))
+	assert '.subckt INV_1 A Y' in lines and '.subckt BUF_1 A Y' in lines
+	assert 'M1 Y Y VSS VSS NMOS W=1u L=0.18u' in lines
+	assert list(netlist_d.iter_flat()) == list(netlist_a.iter_flat())
+
+def test_api_read_netlist_lib_global():
+	lib_dir = tempfile.mkdtemp()
+	with open(f'{lib_dir}/pwr_lib.sp', 'w') as f:
+		f.write('.global VDD VSS\n.subckt INV A Y\nM1 Y A VSS VSS NMOS\nM2 Y A VDD VDD PMOS\n.ends INV\nxdummy a y INV\n')
+	with open(f'{lib_dir}/pwr_deck.sp', 'w') as f:
+		f.write(".include 'pwr_lib.sp'\n.global VSS\nx1 in out INV\n")
+	with warnings.catch_warnings(record = True) as records:
+		warnings.simplefilter('always')
+		pwr_netlist = rdnl.api.read_netlist(f'{lib_dir}/pwr_deck.sp', use_cache = False)
+	flat_nets = [nets for _, nets, _, _ in pwr_netlist.iter_flat()]
+	assert pwr_netlist.globals == ['VSS', 'VDD']
+	assert flat_nets == [['out', 'in', 'VSS', 'VSS'], ['out', 'in', 'VDD', 'VDD']]
+	assert [record.category for record in records] == [RuntimeWarning]
+
+def test_api_read_netlists():
+	file_paths = [netlist_path, '../netlist/buf_chain.sp', '../netlist/dummy_netlist.sp']
+	netlists, report = rdnl.api.read_netlists(file_paths, 2, use_cache = False)
+	lib = rdnl.func.read_lib('../netlist/std_cell_lib.sp', 'TT')
+	file_name = os.path.basename(netlist_path)
+	with open(f'out/batch_{file_name}', 'w') as f:
+		netlists[0].write(f)
+	diff = sp.getoutput(f'diff out/batch_{file_name} ref/{file_name}')
+	os.remove(f'out/batch_{file_name}')
+	assert [path for path, _, _ in report] == file_paths
+	assert [error for _, _, error in report][:2] == [None, None]
+	assert report[2][2].startswith('FileNotFoundError')
+	assert netlists[1].get_subckt('INV') is lib.get_subckt('INV')
+	assert netlists[2] == None
+	assert not diff
+
+def test_api_read_netlist_compressed():
+	tmp_dir = tempfile.mkdtemp()
+	file_name = os.path.basename(netlist_path)
+	diffs = []
+	for ext, codec in [('gz', gzip), ('bz2', bz2), ('xz', lzma)]:
+		comp_path = f'{tmp_dir}/{file_name}.{ext}'
+		with open(netlist_path, 'rb') as f, codec.open(comp_path, 'wb') as comp_f:
+			comp_f.write(f.read())
+		comp_netlist = rdnl.api.read_netlist(comp_path, use_cache = False, lazy = True)
+		with open(f'out/{ext}_{file_name}', 'w') as f:
+			comp_netlist.write(f)
+		diffs.append(sp.getoutput(f'diff out/{ext}_{file_name} ref/{file_name}'))
+		os.remove(f'out/{ext}_{file_name}')
+	assert not any(diffs)
+
+def test_inst_set_attr():
+	attr_netlist = rdnl.api.read_netlist(netlist_path, use_cache = False)
+	nmos_1, nmos_2 = attr_netlist.get_subckt('NAND2').insts[:2]
+	not_nmos = attr_netlist.get_subckt('NOT').insts[0]
+	shared = nmos_1.attr is nmos_2.attr
+	nmos_2.set_attr('W', '3u')
+	try:
+		nmos_1.attr['W'] = '5u'
+		error = None
+	except TypeError as e:
+		error = e
+	nmos_1.attr = dict(nmos_1.attr, L = '2u')
+	assert shared and not hasattr(nmos_2, '__dict__')
+	assert nmos_1.attr['W'] == '1u' and nmos_2.attr['W'] == '3u'
+	assert error != None and not_nmos.attr['W'] == '1u' and not_nmos.attr['L'] == '0.18u'
+	assert nmos_1.attr['L'] == '2u' and nmos_2.attr['L'] == '0.18u'
+	assert copy.deepcopy(nmos_1.attr) == nmos_1.attr
+
+def test_inst_net_ids():
+	id_netlist = rdnl.api.read_netlist(netlist_path, use_cache = False)
+	id_subckt = id_netlist.get_subckt(subckt_name)
+	id_inst = id_subckt.insts[0]
+	net = id_inst.nets[0]
+	net_id = id_subckt.get_net_id(net)
+	assert id_inst.net_ids[0] == net_id and id_subckt.get_net_name(net_id) == net
+	assert id_subckt.port_ids.tolist() == [id_subckt.get_net_id(port) for port in id_subckt.ports]
+	id_subckt.replace_net('new_net', net)
+	assert id_inst.nets[0] == 'new_net' and not id_subckt.has_net(net)
+	id_inst.nets[0] = net
+	assert id_inst.nets[0] == net and id_inst.net_ids[0] == net_id
+
+def test_name_index():
+	idx_netlist = rdnl.api.read_netlist(netlist_path, use_cache = False)
+	idx_subckt = idx_netlist.get_subckt(subckt_name)
+	new_inst = rdnl.core.inst('M0', ['A', 'B', 'VSS', 'VSS'], idx_subckt, 'NMOS', {})
+	idx_subckt.insts.append(new_inst)
+	idx_netlist.short_by_term(subckt_name, [0, 1])
+	found = [idx_subckt.get_inst('M0') == new_inst, idx_netlist.get_subckt(subckt_name) == idx_subckt]
+	rdnl.globalvar.ignore_case = True
+	found += [idx_subckt.get_inst('m0') == new_inst, idx_netlist.get_subckt(subckt_name.lower()) == idx_subckt]
+	rdnl.globalvar.ignore_case = False
+	assert all(found) and idx_subckt.get_inst('m0') == None
+
+def test_pin_index():
+	pin_netlist = rdnl.api.read_netlist(netlist_path, use_cache = False)
+	pin_subckt = pin_netlist.get_subckt(subckt_name)
+	net = pin_subckt.ports[0]
+	pins = pin_subckt.get_pins(net)
+	new_inst = rdnl.core.inst('M0', [net, 'new_net', 'VSS', 'VSS'], pin_subckt, 'NMOS', {})
+	new_inst.is_pri = True
+	pin_subckt.insts.append(new_inst)
+	assert pin_subckt.get_pins(net) == pins + [(new_inst, 0)]
+	pin_subckt.replace_net(net, 'new_net')
+	assert pin_subckt.get_pins(net) == pins + [(new_inst, 0), (new_inst, 1)]
+	assert not pin_subckt.has_net('new_net')
+	new_inst.nets[0] = 'new_net'
+	new_inst.nets[-1] = 'new_bulk'
+	assert pin_subckt.get_pins('new_bulk') == [(new_inst, 3)] and (new_inst, 3) not in pin_subckt.get_pins('VSS')
+	name_inst = rdnl.core.inst('M1', [net, 'name_net', 'VSS', 'VSS'], subckt_name, 'NMOS', {})
+	name_inst.is_pri = True
+	pin_subckt.insts.append(name_inst)
+	assert name_inst.subckt == new_inst.subckt == subckt_name and pin_subckt.get_pins('name_net') == [(name_inst, 1)]
+	name_inst.nets[0:2] = ['slice_a', 'slice_b']
+	name_inst.nets.append('extra')
+	assert name_inst.nets == ['slice_a', 'slice_b', 'VSS', 'VSS', 'extra'] and name_inst.nets.count('VSS') == 2
+	assert pin_subckt.get_pins('extra') == [(name_inst, 4)] and not pin_subckt.has_net('name_net')
+	pin_subckt.insts.remove(new_inst)
+	pin_subckt.insts.remove(name_inst)
+	assert pin_subckt.get_pins(net) == pins and not pin_subckt.has_net('new_net') and not pin_subckt.has_net('new_bulk')
+
+def test_subckt_get_port_index():
+	port_index = [subckt.get_port_index(port) for port in subckt.ports]
+	assert port_index == list(range(len(subckt.ports))) and subckt.get_port_index(net_inv) == None
+
+def test_netlist_node_index():
+	node_netlist = rdnl.api.read_netlist(netlist_path, use_cache = False)
+	node_netlist.build_node_index()
+	node_net_path = node_netlist.get_path_from_str(str_net_path)
+	node_up_path = node_netlist.get_path_from_str(str_up_path)
+	vdd_path = node_netlist.get_path_from_str('xalu4.XAND0.VDD')
+	inner_path = node_netlist.get_path_from_str('xalu4.XFA1.X1.A')
+	node_paths = [node_netlist.get_str_path(i) for i in node_netlist.get_node_paths(node_net_path)]
+	hier_paths = [node_netlist.get_str_path(i) for i in node_netlist.get_hier_net_paths(node_net_path)]
+	groups = node_netlist.group_by_node([node_net_path, node_up_path, vdd_path, ['VDD']])
+	assert node_netlist.is_same_net(node_net_path, node_up_path) and node_paths == hier_paths
+	assert node_netlist.is_same_net(vdd_path, ['VDD']) and len(groups) == 2
+	assert not node_netlist.is_same_net(inner_path, ['VDD'])
+	vdd_node = node_netlist.get_node(['VDD'])
+	node_index = node_netlist.node_index
+	rdnl.api.read_netlist(netlist_path, use_cache = False).get_subckt('NOT').replace_net('VDD', 'A')
+	assert node_netlist.node_index is node_index and node_netlist.get_node(['VDD']) == vdd_node
+	inner_path[1].master.replace_net('VDD', 'A')
+	assert node_netlist.is_same_net(inner_path, ['VDD'])
+	assert node_netlist.node_index is not node_index and node_netlist.get_node(['VSS']) != vdd_node
+
+def test_netlist_pri_summary():
+	summary_path = os.path.join(tempfile.mkdtemp(), 'summary.sp')
+	with open(summary_path, 'w') as f:
+		f.write('.subckt CELL A B\nr0 A n 1\nr1 n B 1\nc0 A B 1\n.ends CELL\n')
+		f.write('.subckt PAIR A B\nx0 A m CELL\nx1 m B CELL\n.ends PAIR\n')
+		f.write('xp0 a b PAIR\nxp1 b a PAIR\n')
+	summary_netlist = rdnl.api.read_netlist(summary_path, use_cache = False)
+	os.remove(summary_path)
+	def visit_inst(path, inst, terms):
+		return ((path + (inst,), list(terms)), False) if inst.is_pri else (None, True)
+	for net in ['a', 'b']:
+		pri_paths = list(summary_netlist.get_net_to_pri_paths([net]))
+		assert pri_paths == list(summary_netlist.walk_net([net], visit_inst))
+		assert len(pri_paths) == 4
+	summary_netlist.get_subckt('CELL').insts.remove(summary_netlist.get_subckt('CELL').get_inst('c0'))
+	pri_paths = list(summary_netlist.get_net_to_pri_paths(['a']))
+	assert pri_paths == list(summary_netlist.walk_net(['a'], visit_inst))
+	assert len(pri_paths) == 2
+	master_netlist = rdnl.api.read_netlist(netlist_path, use_cache = False)
+	net_path = master_netlist.get_path_from_str(str_net_path)
+	old_pri_paths = list(master_netlist.get_net_to_pri_paths(net_path))
+	master_netlist.get_subckt('FULLADDER').get_inst('X1').master = master_netlist.get_subckt('AND2')
+	pri_paths = list(master_netlist.get_net_to_pri_paths(net_path))
+	assert pri_paths != old_pri_paths
+	assert pri_paths == list(master_netlist.walk_net(net_path, visit_inst))
+	master_netlist.get_subckt('FULLADDER').get_inst('X3').is_pri = True
+	pri_paths = list(master_netlist.get_net_to_pri_paths(net_path))
+	assert pri_paths == list(master_netlist.walk_net(net_path, visit_inst))
+
+def test_netlist_walk_deep():
+	depth = sys.getrecursionlimit() + 100
+	deep_path = os.path.join(tempfile.mkdtemp(), 'deep.sp')
+	with open(deep_path, 'w') as f:
+		for d in range(depth):
+			f.write(f'.subckt L{d} A B\n')
+			f.write(f'x{d} A B L{d + 1}\n' if d < depth - 1 else 'r0 A B 1\n')
+			f.write(f'.ends L{d}\n')
+		f.write('xtop a b L0\n')
+	deep_netlist = rdnl.api.read_netlist(deep_path, use_cache = False)
+	pri_paths = list(deep_netlist.get_net_to_pri_paths(['a']))
+	net_paths = list(deep_netlist.get_hier_net_paths(['b']))
+	inst_paths = list(deep_netlist.get_subckt_inst_paths('resistor'))
+	os.remove(deep_path)
+	assert len(pri_paths) == 1 and len(pri_paths[0][0]) == depth + 1 and pri_paths[0][1] == [0]
+	assert len(net_paths) == depth + 1 and inst_paths == [pri_paths[0][0]]
+
 # ---------------------------------------------------------------------
 # performance
 # ---------------------------------------------------------------------